@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 import os
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,13 +48,18 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Before the timing and profiling middleware, so their responses
+    # (including ?profile=text reports) get CORS headers too
     'corsheaders.middleware.CorsMiddleware',
+    'farmers.middleware.RequestTimingMiddleware',
+    'farmers.middleware.ProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'farmers.db.ReadReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -83,9 +90,43 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open between requests instead of reopening the file
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas: DB_REPLICAS is a comma-separated list of SQLite files kept
+# in sync with the primary (e.g. by litestream or `sqlite3 db.sqlite3
+# ".backup replica.sqlite3"`). Read-only requests to READ_REPLICA_PATHS are
+# routed to them by farmers.db.ReadReplicaRouter; tests mirror the primary.
+DATABASE_REPLICAS = []
+for index, path in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['farmers.db.ReadReplicaRouter']
+
+READ_REPLICA_PATHS = [
+    r'^/api/(?:farmers/|users/)?(?:blogs|schemes|profile)/',
+]
+
+# Applied to every new SQLite connection by farmers.db.configure_sqlite.
+# WAL lets readers proceed while a writer commits; NORMAL sync is safe in WAL.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # KiB, i.e. 64 MB per connection
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -132,13 +173,121 @@ AUTH_USER_MODEL = 'farmers.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'farmers.authentication.CachedTokenAuthentication',
     ],
 }
 
+# Token -> user cache used by CachedTokenAuthentication. Entries are dropped
+# on logout, token rotation and user save/delete in the same process; the
+# TTL bounds staleness across processes (deactivation, role changes). The
+# profile endpoint reads the user row itself, so it is never stale.
+AUTH_TOKEN_CACHE_TTL = 5 * 60
+AUTH_TOKEN_CACHE_MAX_ENTRIES = 10000
+# Set to a tuple of User field names to load only those (plus id, is_active,
+# role and updated_at) when authenticating; None loads the full row.
+AUTH_TOKEN_USER_FIELDS = None
+
+# Default page size for the cursor-paginated lists (?page_size= overrides, max 100)
+FEED_PAGE_SIZE = 20
+
 CORS_ALLOW_ALL_ORIGINS = True
+# Let the frontend send and read the profiling and timing headers
+CORS_ALLOW_HEADERS = (*default_headers, 'x-profile')
+CORS_EXPOSE_HEADERS = ['Server-Timing', 'X-Profile']
 
 import os
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Weather cache: coordinates are rounded to this many decimals (~1.1 km at 2)
+WEATHER_CACHE_PRECISION = 2
+WEATHER_CACHE_TTLS = {
+    'current': 10 * 60,
+    'forecast': 60 * 60,
+}
+# How long an expired entry may still be served while it refreshes
+WEATHER_CACHE_STALE_SECONDS = 30 * 60
+WEATHER_CACHE_MAX_ENTRIES = 10000
+
+# Rendered blog PDFs, one file per blog version, and the render pool size
+BLOG_PDF_CACHE_DIR = os.path.join(MEDIA_ROOT, 'blog_pdfs')
+BLOG_PDF_WORKERS = 2
+
+# Market price snapshot refresh interval
+MARKET_PRICE_REFRESH_SECONDS = 15 * 60
+
+# Upstream APIs, used through farmers.utils.upstream.get_client(name).
+# Point the *_BASE_URL variables, or UPSTREAM_STUB_URL for both, at a local
+# stub server (manage.py upstream_stub) to run offline.
+UPSTREAM_STUB_URL = os.environ.get('UPSTREAM_STUB_URL')
+UPSTREAMS = {
+    'openweather': {
+        'base_url': os.environ.get('OPENWEATHER_BASE_URL', UPSTREAM_STUB_URL or 'https://api.openweathermap.org'),
+        'api_key': os.environ.get('OPENWEATHER_API_KEY', '2a496ed70c4234605ff47cea15a3bd6a'),
+        'api_key_param': 'appid',
+        'timeout': (3, 5),
+        'max_connections': 20,
+        'retries': 2,
+        'backoff': 0.25,
+    },
+    'data_gov': {
+        'base_url': os.environ.get('DATA_GOV_BASE_URL', UPSTREAM_STUB_URL or 'https://api.data.gov.in'),
+        'api_key': os.environ.get('DATA_GOV_API_KEY', '579b464db66ec23bdd000001cdd3946e44ce4aad7209ff7b23ac571b'),
+        'api_key_param': 'api-key',
+        'timeout': (3, 15),
+        'max_connections': 4,
+        'retries': 2,
+        'backoff': 1.0,
+    },
+}
+
+# Per-request SQL/upstream/serializer timings (farmers.middleware.RequestTimingMiddleware).
+# Requests over either threshold are logged to farmers.requests.slow with a
+# digest of their most expensive SQL statements.
+REQUEST_TIMING_ENABLED = True
+SERVER_TIMING_HEADER = True
+# Origins allowed to see Server-Timing in the browser's Resource Timing data
+SERVER_TIMING_ALLOW_ORIGIN = '*'
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 50))
+
+# On-demand cProfile runs (farmers.middleware.ProfilingMiddleware): administrators
+# send "X-Profile: text" or ?profile=text for the report, any other value to
+# store it in PROFILE_DIR. PROFILE_SAMPLE_RATE profiles that share of all requests.
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.0))
+PROFILE_MAX_FILES = 200
+PROFILE_REPORT_LINES = 60
+
+# Prometheus metrics at /api/metrics/ (farmers.metrics). With several worker
+# processes, point METRICS_DIR at a directory they share (emptied on deploy)
+# so each scrape reports the totals of all of them. The scraper sends
+# "Authorization: Bearer <METRICS_AUTH_TOKEN>"; administrators can use their
+# own token. METRICS_PUBLIC=1 drops the check (e.g. behind a private network).
+METRICS_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+METRICS_SNAPSHOT_SECONDS = 5
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+    },
+    'loggers': {
+        'farmers': {
+            'handlers': ['console'],
+            'level': os.environ.get('FARMERS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        # One line per request; set to INFO to enable
+        'farmers.requests': {
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
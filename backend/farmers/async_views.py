@@ -0,0 +1,74 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+
+from .authentication import CachedTokenAuthentication
+from .utils.market_prices import amarket_price_payload
+from .utils.weather import aweather_payload
+
+# Native async versions of the upstream-bound views. Under ASGI they wait on
+# the network without holding a worker thread; responses are rendered with
+# DRF's JSONRenderer so they match the sync views byte for byte.
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status,
+        content_type='application/json',
+        headers=headers,
+    )
+
+
+def unauthorized(detail):
+    return json_response({'detail': detail}, status=401, headers={'WWW-Authenticate': 'Token'})
+
+
+async def authenticate(request):
+    """
+    Async equivalent of ``CachedTokenAuthentication`` + ``IsAuthenticated``.
+
+    Runs the same authentication class as the sync views, so header parsing,
+    the token cache and its invalidation stay in one place. Returns
+    ``(user, None)`` on success or ``(None, response)`` with the same 401
+    body DRF would send.
+    """
+    try:
+        result = await sync_to_async(CachedTokenAuthentication().authenticate)(request)
+    except exceptions.AuthenticationFailed as e:
+        return None, unauthorized(e.detail)
+    if result is None:
+        return None, unauthorized(exceptions.NotAuthenticated.default_detail)
+    return result[0], None
+
+
+# 🌦️ Current Weather API (async)
+@require_GET
+async def weather_async(request):
+    user, error = await authenticate(request)
+    if error:
+        return error
+    data, status = await aweather_payload('current', request.GET)
+    return json_response(data, status=status)
+
+
+# 📅 5-day Weather Forecast (async)
+@require_GET
+async def weather_forecast_async(request):
+    user, error = await authenticate(request)
+    if error:
+        return error
+    data, status = await aweather_payload('forecast', request.GET)
+    return json_response(data, status=status)
+
+
+# 🏪 Market Price API (async)
+@require_GET
+async def market_prices_async(request):
+    user, error = await authenticate(request)
+    if error:
+        return error
+    data, status = await amarket_price_payload(request.GET)
+    return json_response(data, status=status)
@@ -0,0 +1,142 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+# Fields always loaded when AUTH_TOKEN_USER_FIELDS selects a slim projection:
+# what authentication, permissions and the ETag validators read.
+REQUIRED_USER_FIELDS = ('id', 'is_active', 'role', 'updated_at')
+
+
+class TokenUserCache:
+    """
+    Bounded LRU of ``token key -> (token, user)`` with a TTL.
+
+    Signal handlers in farmers/signals.py drop entries when a token is
+    deleted (logout, rotation) or its user is saved or deleted in this
+    process; the TTL bounds how long other worker processes can serve a
+    stale user. Callers get copies, so request code mutating
+    ``request.user`` never touches the cached instance.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'AUTH_TOKEN_CACHE_MAX_ENTRIES', 10000)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            token, user, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._copies(token, user)
+
+    def set(self, token, user):
+        """Cache ``(token, user)`` and return copies for the caller to use."""
+        if self.ttl > 0:
+            with self._lock:
+                self._remove(token.key)
+                self._entries[token.key] = (token, user, time.monotonic() + self.ttl)
+                self._keys_by_user.setdefault(user.pk, set()).add(token.key)
+                while len(self._entries) > self.max_entries:
+                    self._remove(next(iter(self._entries)))
+        return self._copies(token, user)
+
+    @staticmethod
+    def _copies(token, user):
+        user = copy.copy(user)
+        token = copy.copy(token)
+        token.user = user
+        return token, user
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[1].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[1].pk]
+
+    def invalidate_key(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_user_cache = TokenUserCache()
+
+
+def token_queryset(model):
+    """Tokens joined to their user, limited to AUTH_TOKEN_USER_FIELDS if set."""
+    # Always the primary: a token issued a moment ago may not be on a replica yet
+    queryset = model.objects.using(DEFAULT_DB_ALIAS).select_related('user')
+    fields = getattr(settings, 'AUTH_TOKEN_USER_FIELDS', None)
+    if fields:
+        names = dict.fromkeys(REQUIRED_USER_FIELDS + tuple(fields))
+        queryset = queryset.only('key', 'created', 'user_id', *(f'user__{name}' for name in names))
+    return queryset
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for DRF's ``TokenAuthentication`` that serves
+    repeat requests from ``token_user_cache`` instead of querying the
+    token and user tables every time.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_user_cache.get(key)
+        if cached is not None:
+            token, user = cached
+        else:
+            model = self.get_model()
+            try:
+                token = token_queryset(model).get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            user = token.user
+            if user.is_active:
+                token, user = token_user_cache.set(token, user)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (user, token)
@@ -0,0 +1,93 @@
+import random
+import re
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Set for the duration of a read-only request that may be served from a
+# replica; see ReadReplicaMiddleware.
+_use_replica = ContextVar('use_replica', default=False)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply SQLITE_PRAGMAS (WAL, synchronous, cache and mmap sizes) to each new connection."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReadReplicaRouter:
+    """
+    Send reads made while ``_use_replica`` is set to a random replica and
+    everything else to the primary.
+
+    Replicas hold the same tables, so relations across aliases are fine;
+    only the primary is migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if replicas and _use_replica.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in replica_aliases() else None
+
+
+class ReadReplicaMiddleware:
+    """
+    Mark GET/HEAD requests to READ_REPLICA_PATHS (feeds, schemes, profiles)
+    as replica-safe. Writes, admin pages and anything else use the primary.
+    """
+    read_methods = ('GET', 'HEAD', 'OPTIONS')
+    # Async-capable so the ASGI stack stays on the event loop for async views
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = [re.compile(pattern) for pattern in getattr(settings, 'READ_REPLICA_PATHS', [])]
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def is_replica_safe(self, request):
+        return request.method in self.read_methods and any(p.match(request.path) for p in self.paths)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_replica_safe(request):
+            return self.get_response(request)
+        token = _use_replica.set(True)
+        try:
+            return self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+    async def __acall__(self, request):
+        if not self.is_replica_safe(request):
+            return await self.get_response(request)
+        token = _use_replica.set(True)
+        try:
+            return await self.get_response(request)
+        finally:
+            _use_replica.reset(token)
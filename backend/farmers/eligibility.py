@@ -0,0 +1,122 @@
+import re
+import threading
+
+from .models import GovernmentScheme
+from .versions import get_version
+
+CRITERIA_LIST_KEYS = ('states', 'crops', 'farming_types')
+CRITERIA_SIZE_KEYS = ('min_farm_size', 'max_farm_size')
+
+_number = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _normalize(value):
+    return value.strip().lower()
+
+
+def parse_farm_size(value):
+    """First number in a free-text farm size such as "2.5 acres", or None."""
+    match = _number.search(value or '')
+    return float(match.group()) if match else None
+
+
+class SchemeEligibilityIndex:
+    """
+    Inverted indexes from structured scheme criteria to scheme ids.
+
+    For each list criterion there is a ``value -> ids`` map plus the set of
+    schemes with no restriction on it; farm size limits are kept per
+    scheme. Serialized scheme payloads are stored alongside, so matching a
+    user is set arithmetic with no text parsing or scheme queries.
+    """
+
+    def __init__(self, schemes, serialize):
+        self.version = None
+        self.all_ids = set()
+        self.payloads = {}
+        self.by_value = {key: {} for key in CRITERIA_LIST_KEYS}
+        self.unrestricted = {key: set() for key in CRITERIA_LIST_KEYS}
+        self.size_limits = {}
+
+        for scheme in schemes:
+            self.all_ids.add(scheme.id)
+            self.payloads[scheme.id] = serialize(scheme)
+            criteria = scheme.criteria or {}
+            for key in CRITERIA_LIST_KEYS:
+                values = [_normalize(v) for v in criteria.get(key) or [] if v and v.strip()]
+                if not values:
+                    self.unrestricted[key].add(scheme.id)
+                for value in values:
+                    self.by_value[key].setdefault(value, set()).add(scheme.id)
+            low = criteria.get('min_farm_size')
+            high = criteria.get('max_farm_size')
+            if low is not None or high is not None:
+                self.size_limits[scheme.id] = (low, high)
+
+    def _candidates(self, key, values):
+        # An unknown attribute cannot rule a scheme out
+        if not values:
+            # A copy: match() narrows the result in place
+            return set(self.all_ids)
+        ids = set(self.unrestricted[key])
+        for value in values:
+            ids |= self.by_value[key].get(value, set())
+        return ids
+
+    def match(self, state='', crops=(), farming_type='', farm_size=None):
+        ids = self._candidates('states', [_normalize(state)] if state.strip() else [])
+        ids &= self._candidates('crops', [_normalize(c) for c in crops if c.strip()])
+        ids &= self._candidates('farming_types', [_normalize(farming_type)] if farming_type.strip() else [])
+        if farm_size is not None:
+            for scheme_id, (low, high) in self.size_limits.items():
+                if scheme_id in ids and (
+                    (low is not None and farm_size < low) or (high is not None and farm_size > high)
+                ):
+                    ids.discard(scheme_id)
+        return sorted(ids)
+
+    def match_user(self, user):
+        return self.match(
+            state=user.state or '',
+            crops=(user.main_crops or '').split(','),
+            farming_type=user.type_of_farming or '',
+            farm_size=parse_farm_size(user.farm_size),
+        )
+
+
+class SchemeIndexCache:
+    """
+    Process-wide ``SchemeEligibilityIndex``.
+
+    Signals drop the index when a scheme is saved or deleted in this
+    process; the ``schemes`` table version catches edits made by other
+    worker processes, at the cost of one single-row lookup per request.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._index = None
+
+    def get(self):
+        from .serializers import GovernmentSchemeSerializer
+
+        version = get_version('schemes')
+        index = self._index
+        if index is not None and index.version == version:
+            return index
+        with self._lock:
+            index = self._index
+            if index is None or index.version != version:
+                index = SchemeEligibilityIndex(
+                    GovernmentScheme.objects.order_by('id'),
+                    lambda scheme: GovernmentSchemeSerializer(scheme).data,
+                )
+                index.version = version
+                self._index = index
+        return index
+
+
+scheme_index = SchemeIndexCache()
@@ -0,0 +1,59 @@
+import hashlib
+
+from django.db.models import Exists, OuterRef, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Blog, User, Vote
+from .versions import get_version
+
+# Validators for the read-mostly endpoints. Each is computed from a version
+# counter or a narrow query, never from the serialized body, so a matching
+# If-None-Match costs one small query and no serialization.
+
+
+def _digest(*parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def scheme_list_etag():
+    return f'"schemes-{get_version("schemes")}"'
+
+
+def scheme_etag(pk):
+    # Any scheme write bumps the version, so this is exact for one row too
+    return f'"scheme-{pk}-{get_version("schemes")}"'
+
+
+def blog_etag(pk, user):
+    """
+    ETag of a blog detail payload as seen by ``user``, or None if the blog
+    does not exist.
+
+    Covers everything BlogSerializer renders: the row itself, its counters,
+    the author's name, the poll tallies and the user's saved/voted flags.
+    """
+    if user.is_authenticated:
+        is_saved = Exists(User.saved_posts.through.objects.filter(blog_id=OuterRef('pk'), user_id=user.pk))
+        has_voted = Exists(Vote.objects.filter(poll_id=OuterRef('poll_id'), voted_by_id=user.pk))
+    else:
+        is_saved = has_voted = Value(False)
+    row = (
+        Blog.objects.filter(pk=pk)
+        .annotate(
+            total_votes=Coalesce(Sum('poll__choices__vote_count'), 0),
+            is_saved=is_saved,
+            has_voted=has_voted,
+        )
+        .values_list(
+            'updated_at', 'like_count', 'comment_count', 'author__updated_at',
+            'total_votes', 'is_saved', 'has_voted',
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    return _digest('blog', pk, user.pk, *row)
+
+
+def profile_etag(user, fields):
+    return _digest('profile', user.pk, user.updated_at, tuple(fields))
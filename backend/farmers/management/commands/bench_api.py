@@ -0,0 +1,183 @@
+import json
+import logging
+import math
+import platform
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from farmers.models import User
+
+# name -> (path, query params, role of the caller)
+ENDPOINTS = {
+    'blogs': ('/api/blogs/', {}, 'farmer'),
+    'profile': ('/api/profile/', {}, 'farmer'),
+    'schemes': ('/api/schemes/', {}, 'farmer'),
+    'market-prices': ('/api/market-prices/', {'state': 'Gujarat'}, 'farmer'),
+    'weather': ('/api/weather/', {'lat': '22.56', 'lon': '72.95'}, 'farmer'),
+    'admin-stats': ('/api/admin/stats/', {}, 'administrator'),
+}
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the hot API endpoints in-process and report throughput, latency "
+        "percentiles and SQL queries per request as JSON. Seed data first with "
+        "seed_benchmark."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--endpoints', default=','.join(ENDPOINTS),
+            help=f"Comma-separated subset of: {', '.join(ENDPOINTS)}.",
+        )
+        parser.add_argument('--requests', type=int, default=200, help="Measured requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=10, help="Unmeasured requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=1, help="Client threads per endpoint.")
+        parser.add_argument('--output', help="Write the JSON report to this file as well as stdout.")
+        parser.add_argument('--baseline', help="Earlier report to compare p50/p95 and throughput against.")
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = set(names) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}.")
+
+        tokens = {role: self.token_for(role) for role in {ENDPOINTS[name][2] for name in names}}
+        report = {
+            'meta': {
+                'revision': git_revision(),
+                'timestamp': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'concurrency': options['concurrency'],
+                # Query counts below are summed over these aliases
+                'databases': list(connections),
+            },
+            'endpoints': {},
+        }
+        # Error responses are counted in the report; don't log each one
+        request_logger = logging.getLogger('django.request')
+        request_logger.disabled = True
+        try:
+            for name in names:
+                path, params, role = ENDPOINTS[name]
+                self.stderr.write(f"{name}: {options['requests']} requests...")
+                report['endpoints'][name] = self.run_endpoint(
+                    path, params, tokens[role], options['requests'], options['warmup'], options['concurrency'],
+                )
+        finally:
+            request_logger.disabled = False
+
+        text = json.dumps(report, indent=2)
+        self.stdout.write(text)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(text + '\n')
+        if options['baseline']:
+            self.compare(report, options['baseline'])
+
+    def token_for(self, role):
+        user = User.objects.filter(role=role, is_active=True).order_by('id').first()
+        if user is None:
+            raise CommandError(f"No active {role} user; run seed_benchmark first.")
+        return Token.objects.get_or_create(user=user)[0].key
+
+    def run_endpoint(self, path, params, token, total, warmup, concurrency):
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}', 'SERVER_NAME': 'localhost'}
+        samples = []
+        statuses = {}
+        lock = threading.Lock()
+
+        def one(client, measure):
+            # Every alias, so reads routed to replicas are counted too
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(conn)) for conn in connections.all()]
+                started = time.perf_counter()
+                response = client.get(path, params, **headers)
+                elapsed = time.perf_counter() - started
+            if measure:
+                with lock:
+                    samples.append((elapsed, sum(len(queries) for queries in captured)))
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        def worker(count, measure):
+            client = Client()
+            for _ in range(count):
+                one(client, measure)
+            connections.close_all()
+
+        def split(count):
+            return [count // concurrency + (1 if i < count % concurrency else 0) for i in range(concurrency)]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda count: worker(count, False), split(warmup)))
+            started = time.perf_counter()
+            list(pool.map(lambda count: worker(count, True), split(total)))
+            wall = time.perf_counter() - started
+
+        latencies = sorted(elapsed * 1000 for elapsed, _ in samples)
+        queries = [count for _, count in samples]
+        return {
+            'requests': len(samples),
+            'status_codes': {str(code): n for code, n in sorted(statuses.items())},
+            'throughput_rps': round(len(samples) / wall, 2) if wall else None,
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies), 3) if latencies else None,
+                'p50': round(percentile(latencies, 50), 3) if latencies else None,
+                'p95': round(percentile(latencies, 95), 3) if latencies else None,
+                'p99': round(percentile(latencies, 99), 3) if latencies else None,
+                'max': round(latencies[-1], 3) if latencies else None,
+            },
+            'queries_per_request': {
+                'mean': round(sum(queries) / len(queries), 2) if queries else None,
+                'max': max(queries) if queries else None,
+            },
+        }
+
+    def compare(self, report, baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        self.stderr.write(f"\nCompared with {baseline_path} ({baseline['meta'].get('revision')}):")
+        for name, result in report['endpoints'].items():
+            before = baseline['endpoints'].get(name)
+            if before is None:
+                continue
+            parts = []
+            for label, new, old in (
+                ('p50', result['latency_ms']['p50'], before['latency_ms']['p50']),
+                ('p95', result['latency_ms']['p95'], before['latency_ms']['p95']),
+                ('rps', result['throughput_rps'], before['throughput_rps']),
+            ):
+                if new is not None and old:
+                    parts.append(f"{label} {old} -> {new} ({(new - old) / old:+.0%})")
+            self.stderr.write(f"  {name}: {', '.join(parts)}")
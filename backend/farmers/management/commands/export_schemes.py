@@ -0,0 +1,51 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand
+
+from farmers.models import GovernmentScheme
+
+FIELDS = ['external_id', 'name', 'benefit', 'eligibility', 'docs', 'apply_url', 'criteria']
+
+
+class Echo:
+    """File-like object whose write() returns the line, for streaming csv rows."""
+
+    def write(self, value):
+        return value
+
+
+class Command(BaseCommand):
+    help = "Write every government scheme as JSON or CSV, in the format import_schemes reads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['json', 'csv'], default='json')
+        parser.add_argument('--output', help="File to write (default: stdout).")
+
+    def handle(self, *args, **options):
+        # iterator() streams rows from the cursor instead of caching the
+        # whole catalog, so memory stays flat however many schemes there are
+        schemes = GovernmentScheme.objects.order_by('id').values(*FIELDS).iterator(chunk_size=500)
+        chunks = self.csv_chunks(schemes) if options['format'] == 'csv' else self.json_chunks(schemes)
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                f.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+
+    @staticmethod
+    def json_chunks(schemes):
+        yield '['
+        for i, scheme in enumerate(schemes):
+            yield (',\n' if i else '\n') + json.dumps(scheme, ensure_ascii=False)
+        yield '\n]\n'
+
+    @staticmethod
+    def csv_chunks(schemes):
+        writer = csv.DictWriter(Echo(), fieldnames=FIELDS)
+        yield writer.writeheader()
+        for scheme in schemes:
+            scheme['criteria'] = json.dumps(scheme['criteria'] or {}, ensure_ascii=False)
+            yield writer.writerow(scheme)
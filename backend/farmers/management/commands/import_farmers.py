@@ -0,0 +1,204 @@
+import csv
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from farmers import stats
+from farmers.models import User
+from farmers.utils.passwords import hash_password
+
+# Accepted column names -> User fields
+COLUMNS = {
+    'phone': 'phone',
+    'name': 'name',
+    'state': 'state',
+    'district': 'district',
+    'village': 'village',
+    'crops': 'main_crops',
+    'main_crops': 'main_crops',
+    'language': 'preferred_language',
+    'preferred_language': 'preferred_language',
+    'password': 'password',
+}
+
+_phone = re.compile(r'^\+?\d{10,14}$')
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise CommandError("Reading .xlsx files requires openpyxl (pip install openpyxl).")
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell or '').strip() for cell in next(rows, ())]
+        for values in rows:
+            yield {key: '' if value is None else str(value) for key, value in zip(header, values)}
+    finally:
+        workbook.close()
+
+
+def clean_row(raw):
+    """Map a raw row onto User fields; returns ``(fields, error)``."""
+    fields = {}
+    for key, value in raw.items():
+        field = COLUMNS.get((key or '').strip().lower())
+        if field:
+            fields[field] = (value or '').strip()
+    phone = re.sub(r'[\s-]', '', fields.get('phone', ''))
+    if not _phone.match(phone):
+        return None, f"invalid phone {fields.get('phone', '')!r}"
+    fields['phone'] = phone
+    if not fields.get('name'):
+        return None, "name is required"
+    for field, value in fields.items():
+        if field != 'password':
+            fields[field] = value[:User._meta.get_field(field).max_length]
+    return fields, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Import farmers from a CSV or XLSX file with columns phone, name, state, "
+        "district, village, crops, language and optionally password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file to import.")
+        parser.add_argument(
+            '--default-password',
+            help="Password for rows without one. Without it such users get an unusable password.",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per transaction.")
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Password hashing processes; 1 hashes in this process.",
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help="Progress file used to resume an interrupted import (default: <path>.checkpoint).",
+        )
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist.")
+        if path.lower().endswith('.xlsx'):
+            rows = read_xlsx(path)
+        elif path.lower().endswith('.csv'):
+            rows = read_csv(path)
+        else:
+            raise CommandError("Only .csv and .xlsx files are supported.")
+
+        checkpoint_path = options['checkpoint'] or f"{path}.checkpoint"
+        done = 0 if options['restart'] else self.read_checkpoint(checkpoint_path, path)
+        if done:
+            self.stdout.write(f"Resuming after row {done}.")
+
+        self.default_password = options['default_password']
+        batch_size = max(options['batch_size'], 1)
+        workers = max(options['workers'], 1)
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+        self.created = self.skipped = 0
+        self.errors = []
+        seen = set()
+        batch = []
+        row_number = 0
+        try:
+            for row_number, raw in enumerate(rows, start=1):
+                if row_number <= done:
+                    continue
+                fields, error = clean_row(raw)
+                if error:
+                    self.errors.append(f"row {row_number}: {error}")
+                    continue
+                if fields['phone'] in seen:
+                    self.skipped += 1
+                    continue
+                seen.add(fields['phone'])
+                batch.append(fields)
+                if len(batch) >= batch_size:
+                    self.import_batch(batch, executor)
+                    self.write_checkpoint(checkpoint_path, path, row_number)
+                    batch = []
+            if batch:
+                self.import_batch(batch, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # Finished: a rerun should start over (already imported phones are skipped)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        for error in self.errors[:20]:
+            self.stderr.write(error)
+        if len(self.errors) > 20:
+            self.stderr.write(f"... and {len(self.errors) - 20} more invalid row(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.created} farmer(s) created, {self.skipped} duplicate(s) skipped, "
+            f"{len(self.errors)} invalid row(s)."
+        ))
+
+    def import_batch(self, batch, executor):
+        existing = set(
+            User.objects.filter(phone__in=[fields['phone'] for fields in batch]).values_list('phone', flat=True)
+        )
+        new = [fields for fields in batch if fields['phone'] not in existing]
+        self.skipped += len(batch) - len(new)
+        if not new:
+            return
+
+        passwords = [fields.pop('password', '') or self.default_password for fields in new]
+        if executor is not None:
+            hashes = list(executor.map(hash_password, passwords, chunksize=max(len(passwords) // 32, 1)))
+        else:
+            hashes = [hash_password(password) for password in passwords]
+
+        users = [User(role='farmer', password=hashed, **fields) for fields, hashed in zip(new, hashes)]
+        with transaction.atomic():
+            users = User.objects.bulk_create(users)
+            Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users])
+            # bulk_create() skips the signals that keep the dashboard counters
+            stats.bump(stats.TOTAL_USERS, len(users))
+            stats.bump(stats.role_counter('farmer'), len(users))
+            stats.bump(stats.NEW_USERS, len(users), day=timezone.localdate())
+        self.created += len(users)
+        self.stdout.write(f"{self.created} farmer(s) imported...")
+
+    @staticmethod
+    def source_signature(path):
+        stat = os.stat(path)
+        return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def read_checkpoint(self, checkpoint_path, path):
+        try:
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+        if checkpoint.get('source') != self.source_signature(path):
+            self.stderr.write(f"Ignoring {checkpoint_path}: it belongs to a different version of the file.")
+            return 0
+        return int(checkpoint.get('rows_done', 0))
+
+    def write_checkpoint(self, checkpoint_path, path, rows_done):
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'source': self.source_signature(path), 'rows_done': rows_done}, f)
+        os.replace(tmp_path, checkpoint_path)
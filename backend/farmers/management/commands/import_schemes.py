@@ -0,0 +1,117 @@
+import csv
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from farmers import stats
+from farmers.eligibility import scheme_index
+from farmers.models import GovernmentScheme
+from farmers.serializers import GovernmentSchemeSerializer
+from farmers.versions import bump_version
+
+BATCH_SIZE = 500
+
+
+class SchemeImportSerializer(GovernmentSchemeSerializer):
+    class Meta(GovernmentSchemeSerializer.Meta):
+        fields = ['external_id', 'name', 'benefit', 'eligibility', 'docs', 'apply_url', 'criteria']
+        # Uniqueness is what the upsert is keyed on; checking it per row
+        # would cost a query each
+        extra_kwargs = {'external_id': {
+            'required': True, 'allow_null': False, 'allow_blank': False, 'validators': [],
+        }}
+
+
+def read_rows(path):
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('schemes')
+        if not isinstance(data, list):
+            raise CommandError("JSON input must be a list of schemes or {\"schemes\": [...]}.")
+        return data
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            criteria = (row.get('criteria') or '').strip()
+            try:
+                row['criteria'] = json.loads(criteria) if criteria else {}
+            except ValueError:
+                row['criteria'] = criteria  # reported by the serializer
+        return rows
+    raise CommandError("Only .json and .csv files are supported.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update government schemes from a JSON or CSV file, matched on "
+        "external_id. All rows are applied in one transaction or not at all."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON or CSV file, e.g. one written by export_schemes.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate and report without saving.")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f"{options['path']} does not exist.")
+        rows = read_rows(options['path'])
+
+        external_ids = [str(row.get('external_id') or '').strip() for row in rows]
+        existing = GovernmentScheme.objects.in_bulk([eid for eid in external_ids if eid], field_name='external_id')
+
+        errors = []
+        seen = set()
+        to_create, to_update, update_fields = [], [], set()
+        for number, (row, external_id) in enumerate(zip(rows, external_ids), start=1):
+            if external_id and external_id in seen:
+                errors.append(f"row {number}: duplicate external_id {external_id!r}")
+                continue
+            seen.add(external_id)
+            scheme = existing.get(external_id)
+            # Columns missing from the file leave existing values alone
+            serializer = SchemeImportSerializer(scheme, data=row, partial=scheme is not None)
+            if not serializer.is_valid():
+                errors.append(f"row {number}: {json.dumps(serializer.errors)}")
+                continue
+            data = serializer.validated_data
+            if scheme is None:
+                to_create.append(GovernmentScheme(**data))
+                continue
+            changed = [field for field, value in data.items() if getattr(scheme, field) != value]
+            if changed:
+                for field in changed:
+                    setattr(scheme, field, data[field])
+                update_fields.update(changed)
+                to_update.append(scheme)
+
+        if errors:
+            for error in errors[:20]:
+                self.stderr.write(error)
+            raise CommandError(f"{len(errors)} invalid row(s); nothing was imported.")
+
+        summary = f"{len(to_create)} scheme(s) to create, {len(to_update)} to update."
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(summary))
+            return
+
+        with transaction.atomic():
+            GovernmentScheme.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+            if to_update:
+                GovernmentScheme.objects.bulk_update(to_update, sorted(update_fields), batch_size=BATCH_SIZE)
+            if to_create or to_update:
+                # bulk_create()/bulk_update() skip the per-row signals; do
+                # their work once for the whole batch instead
+                if to_create:
+                    stats.bump(stats.TOTAL_SCHEMES, len(to_create))
+                bump_version('schemes')
+                transaction.on_commit(scheme_index.invalidate)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(to_create)} scheme(s) created, {len(to_update)} updated, "
+            f"{len(rows) - len(to_create) - len(to_update)} unchanged."
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from farmers.models import Blog
+
+
+class Command(BaseCommand):
+    help = "Recompute Blog.like_count and Blog.comment_count and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report blogs whose counters are wrong.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = Blog.objects.with_actual_counts().filter(
+            ~Q(like_count=F('actual_like_count')) | ~Q(comment_count=F('actual_comment_count'))
+        )
+
+        drifted_ids = []
+        for blog in drifted.only('id', 'like_count', 'comment_count').iterator():
+            self.stdout.write(
+                f"Blog #{blog.id}: likes {blog.like_count} -> {blog.actual_like_count}, "
+                f"comments {blog.comment_count} -> {blog.actual_comment_count}"
+            )
+            drifted_ids.append(blog.id)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"{len(drifted_ids)} blog(s) would be repaired."))
+            return
+
+        # Recount inside the UPDATE itself so likes written meanwhile are not lost
+        repaired = Blog.objects.filter(id__in=drifted_ids).repair_counters()
+        self.stdout.write(self.style.SUCCESS(f"{repaired} blog(s) repaired."))
@@ -0,0 +1,215 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from farmers import search
+from farmers.eligibility import scheme_index
+from farmers.models import Blog, Choice, Comment, GovernmentScheme, Poll, Tag, User, Vote
+from farmers.stats import recompute_stats
+from farmers.versions import bump_version
+
+# Share of each role among generated users
+ROLE_WEIGHTS = {
+    'farmer': 80,
+    'expert_advisor': 8,
+    'retailer': 6,
+    'government_official': 4,
+    'administrator': 2,
+}
+STATES = {
+    'Gujarat': ['Anand', 'Rajkot', 'Surat', 'Mehsana'],
+    'Punjab': ['Ludhiana', 'Amritsar', 'Patiala'],
+    'Maharashtra': ['Nashik', 'Pune', 'Nagpur'],
+    'Uttar Pradesh': ['Lucknow', 'Varanasi', 'Agra'],
+}
+CROPS = ['wheat', 'rice', 'cotton', 'groundnut', 'sugarcane', 'maize', 'soybean', 'onion', 'tomato']
+FARMING_TYPES = ['organic', 'conventional', 'mixed']
+TOPICS = [
+    'Drip irrigation cut my water use by half this season',
+    'Which fertilizer works best for {crop} in black soil?',
+    'Monsoon arrived early, sowing {crop} this week',
+    'Mandi prices for {crop} are up again',
+    'Pest attack on {crop}, any organic remedies?',
+    'Sharing my soil test results for the {crop} field',
+]
+
+BATCH_SIZE = 1000
+
+
+def spread(now, index, total, days):
+    """Timestamps evenly spread over the last ``days`` days, oldest first."""
+    return now - timedelta(days=days) * (1 - index / max(total, 1))
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset (users, tokens, blogs, polls, votes, likes, "
+        "comments, saved posts and schemes) for the benchmark driver."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--blogs', type=int, default=5000)
+        parser.add_argument('--comments-per-blog', type=int, default=3)
+        parser.add_argument('--likes-per-blog', type=int, default=8)
+        parser.add_argument('--saves-per-user', type=int, default=5)
+        parser.add_argument('--poll-ratio', type=float, default=0.2, help="Share of blogs that carry a poll.")
+        parser.add_argument('--schemes', type=int, default=200)
+        parser.add_argument('--days', type=int, default=90, help="Spread creation dates over this many days.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.days = options['days']
+
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            blogs = self.create_blogs(users, options['blogs'], options['poll_ratio'])
+            self.create_likes_and_saves(users, blogs, options['likes_per_blog'], options['saves_per_user'])
+            self.create_comments(users, blogs, options['comments_per_blog'])
+            self.create_votes(users)
+            self.create_schemes(options['schemes'])
+
+            # bulk_create() skips signals and the counter updates in the
+            # views, so rebuild everything derived in one go
+            Blog.objects.all().repair_counters()
+            self.repair_vote_counts()
+            recompute_stats()
+            bump_version('schemes')
+            search.rebuild_index()
+        scheme_index.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {len(blogs)} blogs and {options['schemes']} schemes."
+        ))
+
+    def create_users(self, count):
+        start = (User.objects.aggregate(n=Max('id'))['n'] or 0) + 1
+        # One shared hash: every benchmark user's password is "benchmark"
+        password = make_password('benchmark')
+        roles = self.rng.choices(list(ROLE_WEIGHTS), weights=list(ROLE_WEIGHTS.values()), k=count)
+        users = []
+        for i, role in enumerate(roles):
+            state = self.rng.choice(list(STATES))
+            users.append(User(
+                phone=f'7{start + i:09d}', name=f'Bench User {start + i}', role=role, password=password,
+                is_staff=role == 'administrator', state=state, district=self.rng.choice(STATES[state]),
+                village=f'Village {self.rng.randint(1, 500)}', preferred_language='Hindi',
+                main_crops=', '.join(self.rng.sample(CROPS, 2)), farm_size=f'{self.rng.randint(1, 20)} acres',
+                type_of_farming=self.rng.choice(FARMING_TYPES),
+            ))
+        users = User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        for i, user in enumerate(users):
+            user.date_joined = spread(self.now, i, count, self.days)
+        User.objects.bulk_update(users, ['date_joined'], batch_size=BATCH_SIZE)
+        Token.objects.bulk_create(
+            [Token(key=Token.generate_key(), user=user) for user in users], batch_size=BATCH_SIZE
+        )
+        return users
+
+    def create_blogs(self, users, count, poll_ratio):
+        Tag.objects.bulk_create([Tag(name=name) for name in CROPS + FARMING_TYPES], ignore_conflicts=True)
+        tags = {tag.name: tag for tag in Tag.objects.filter(name__in=CROPS + FARMING_TYPES)}
+
+        polls = Poll.objects.bulk_create([
+            Poll(question='Will you sow early this year?', created_by=self.rng.choice(users))
+            for _ in range(min(int(count * poll_ratio), count))
+        ], batch_size=BATCH_SIZE)
+        Choice.objects.bulk_create([
+            Choice(poll=poll, choice_text=text) for poll in polls for text in ('Yes', 'No', 'Not sure')
+        ], batch_size=BATCH_SIZE)
+
+        # Scatter the polls through the feed rather than bunching them up
+        poll_for = dict(zip(self.rng.sample(range(count), len(polls)), polls))
+        blogs = []
+        blog_tags = []
+        for i in range(count):
+            crop = self.rng.choice(CROPS)
+            names = [crop, self.rng.choice(FARMING_TYPES)]
+            blogs.append(Blog(
+                author=self.rng.choice(users),
+                content=self.rng.choice(TOPICS).format(crop=crop),
+                tags=', '.join(names),
+                poll=poll_for.get(i),
+            ))
+            blog_tags.append(names)
+        blogs = Blog.objects.bulk_create(blogs, batch_size=BATCH_SIZE)
+        for i, blog in enumerate(blogs):
+            blog.created_at = spread(self.now, i, count, self.days)
+        Blog.objects.bulk_update(blogs, ['created_at'], batch_size=BATCH_SIZE)
+        Blog.normalized_tags.through.objects.bulk_create([
+            Blog.normalized_tags.through(blog_id=blog.id, tag_id=tags[name].id)
+            for blog, names in zip(blogs, blog_tags) for name in names
+        ], batch_size=BATCH_SIZE)
+        return blogs
+
+    def create_likes_and_saves(self, users, blogs, likes_per_blog, saves_per_user):
+        Like = Blog.likes.through
+        likes = [
+            Like(blog_id=blog.id, user_id=user.id)
+            for blog in blogs
+            for user in self.rng.sample(users, min(self.rng.randint(0, likes_per_blog * 2), len(users)))
+        ]
+        Like.objects.bulk_create(likes, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+        Saved = User.saved_posts.through
+        saves = [
+            Saved(user_id=user.id, blog_id=blog.id)
+            for user in users
+            for blog in self.rng.sample(blogs, min(saves_per_user, len(blogs)))
+        ]
+        Saved.objects.bulk_create(saves, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    def create_comments(self, users, blogs, per_blog):
+        comments = [
+            Comment(blog=blog, author=self.rng.choice(users), content='Thanks for sharing, very useful.')
+            for blog in blogs
+            for _ in range(self.rng.randint(0, per_blog * 2))
+        ]
+        comments = Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+        for i, comment in enumerate(comments):
+            comment.created_at = spread(self.now, i, len(comments), self.days)
+        Comment.objects.bulk_update(comments, ['created_at'], batch_size=BATCH_SIZE)
+
+    def create_votes(self, users):
+        votes = []
+        choices = {}
+        for choice in Choice.objects.filter(poll__blog__isnull=False).only('id', 'poll_id'):
+            choices.setdefault(choice.poll_id, []).append(choice.id)
+        for poll_id, choice_ids in choices.items():
+            for user in self.rng.sample(users, min(self.rng.randint(0, 20), len(users))):
+                votes.append(Vote(poll_id=poll_id, choice_id=self.rng.choice(choice_ids), voted_by_id=user.id))
+        Vote.objects.bulk_create(votes, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    def repair_vote_counts(self):
+        votes = (
+            Vote.objects.filter(choice_id=OuterRef('pk'))
+            .order_by().values('choice_id').annotate(n=Count('*')).values('n')
+        )
+        Choice.objects.update(vote_count=Coalesce(Subquery(votes, output_field=IntegerField()), 0))
+
+    def create_schemes(self, count):
+        start = (GovernmentScheme.objects.aggregate(n=Max('id'))['n'] or 0) + 1
+        schemes = []
+        for i in range(start, start + count):
+            criteria = {}
+            if self.rng.random() < 0.5:
+                criteria['states'] = self.rng.sample(list(STATES), 2)
+            if self.rng.random() < 0.5:
+                criteria['crops'] = self.rng.sample(CROPS, 3)
+            if self.rng.random() < 0.3:
+                criteria['max_farm_size'] = self.rng.choice([2, 5, 10])
+            schemes.append(GovernmentScheme(
+                external_id=f'bench-{i}', name=f'Benchmark Scheme {i}', benefit='Input subsidy',
+                eligibility='Small and marginal farmers', docs='Aadhaar, land record',
+                apply_url='https://example.gov.in/apply', criteria=criteria,
+            ))
+        GovernmentScheme.objects.bulk_create(schemes, batch_size=BATCH_SIZE)
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from farmers.utils.upstream_stub import StubBehaviour, make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve recorded OpenWeather and data.gov.in responses locally, with optional "
+        "latency, error and timeout injection, so the weather and market price "
+        "endpoints can be developed and benchmarked offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8900)
+        parser.add_argument(
+            '--latency', default='none',
+            help="none, fixed:MS, uniform:MIN,MAX, normal:MEAN,STDDEV or lognormal:MEDIAN,SIGMA (milliseconds).",
+        )
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with an error.")
+        parser.add_argument('--error-status', type=int, default=503)
+        parser.add_argument(
+            '--timeout-rate', type=float, default=0.0,
+            help="Share of requests that hang for --hang-seconds and then drop the connection.",
+        )
+        parser.add_argument('--hang-seconds', type=float, default=30.0)
+        parser.add_argument('--seed', type=int, help="Make injected latency and failures reproducible.")
+        parser.add_argument('--verbose-requests', action='store_true', help="Log every request.")
+
+    def handle(self, *args, **options):
+        if not 0 <= options['error_rate'] + options['timeout_rate'] <= 1:
+            raise CommandError("--error-rate plus --timeout-rate must be between 0 and 1.")
+        try:
+            behaviour = StubBehaviour(
+                latency=options['latency'], error_rate=options['error_rate'],
+                error_status=options['error_status'], timeout_rate=options['timeout_rate'],
+                hang_seconds=options['hang_seconds'], seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        server = make_server(options['host'], options['port'], behaviour, options['verbose_requests'])
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f"Upstream stub listening on http://{host}:{port}"))
+        self.stdout.write(f"Run the API against it with:\n  export UPSTREAM_STUB_URL=http://{host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            counts = behaviour.counts
+            self.stdout.write(
+                f"\nServed {counts['requests']} requests "
+                f"({counts['errors']} injected errors, {counts['timeouts']} timeouts)."
+            )
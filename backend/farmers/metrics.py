@@ -0,0 +1,304 @@
+import atexit
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# <pid>.json, as written by Registry.write_snapshot
+SNAPSHOT_NAME = re.compile(r'^(\d+)\.json$')
+
+
+class Metric:
+    def __init__(self, registry, name, help, kind, labelnames=(), buckets=None, live_only=False):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+        # Gauges such as in-flight requests only make sense for live processes
+        self.live_only = live_only
+
+    def inc(self, *labels, amount=1):
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def observe(self, value, *labels):
+        """Histograms: store per-bucket counts (the last slot is +Inf) followed by the sum."""
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        slots = shard.get(key)
+        if slots is None:
+            slots = shard[key] = [0] * (len(self.buckets) + 2)
+        slots[bisect_left(self.buckets, value)] += 1
+        slots[-1] += value
+
+
+class _ShardHandle:
+    """Held in thread-local storage; its finalizer retires the thread's shard."""
+    __slots__ = ('__weakref__',)
+
+
+class Registry:
+    """
+    Counters, gauges and histograms kept in per-thread shards.
+
+    Recording only touches the calling thread's dict, so request threads
+    never contend; the registry lock is taken once per new thread, when a
+    thread exits and on collection. A finished thread's shard is folded into
+    a base total, so the shard count tracks live threads (ASGI runs sync code
+    on short-lived threads) and nothing recorded is lost.
+
+    With METRICS_DIR set, every worker process writes its totals to
+    ``<pid>.json`` there (at most every METRICS_SNAPSHOT_SECONDS, on scrape
+    and at exit) and a scrape of any worker merges all of them.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._collectors = []
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {}
+        self._lock = threading.Lock()
+        self._last_snapshot = 0.0
+
+    def metric(self, name, help, kind, labelnames=(), **kwargs):
+        metric = self.metrics[name] = Metric(self, name, help, kind, labelnames, **kwargs)
+        return metric
+
+    def add_collector(self, collect):
+        """``collect()`` yields ``(name, labels, value)`` for counters kept elsewhere, e.g. by a cache."""
+        self._collectors.append(collect)
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            handle = self._local.handle = _ShardHandle()
+            with self._lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(handle, self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._shards.pop(id(shard), None)
+            for key, value in shard.items():
+                _add(self._retired, key, value)
+
+    def samples(self):
+        """This process's totals as ``{(name, labels): value}``."""
+        totals = {}
+        with self._lock:
+            shards = [dict(shard) for shard in self._shards.values()]
+            for key, value in self._retired.items():
+                _add(totals, key, value)
+        for shard in shards:
+            for key, value in shard.items():
+                _add(totals, key, value)
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                _add(totals, (name, tuple(labels)), value)
+        return totals
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_DIR', None)
+
+    def write_snapshot(self):
+        directory = self.directory
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        payload = [[name, list(labels), value] for (name, labels), value in self.samples().items()]
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as tmp:
+            json.dump(payload, tmp)
+        os.replace(tmp_path, os.path.join(directory, f'{os.getpid()}.json'))
+        self._last_snapshot = time.monotonic()
+
+    def maybe_write_snapshot(self):
+        if self.directory and time.monotonic() - self._last_snapshot >= getattr(
+            settings, 'METRICS_SNAPSHOT_SECONDS', 5
+        ):
+            self.write_snapshot()
+
+    def collect(self):
+        """Totals across all worker processes (or just this one without METRICS_DIR)."""
+        directory = self.directory
+        if not directory:
+            return self.samples()
+        self.write_snapshot()
+        totals = {}
+        for filename in os.listdir(directory):
+            match = SNAPSHOT_NAME.match(filename)
+            if match is None:
+                continue
+            pid = int(match.group(1))
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = pid == os.getpid() or _pid_alive(pid)
+            for name, labels, value in payload:
+                metric = self.metrics.get(name)
+                if metric is not None and metric.live_only and not alive:
+                    continue
+                _add(totals, (name, tuple(labels)), value)
+        return totals
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        by_name = {}
+        for (name, labels), value in sorted(self.collect().items()):
+            by_name.setdefault(name, []).append((labels, value))
+        by_name.update(_derived(by_name))
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for labels, value in by_name.get(name, []):
+                pairs = list(zip(metric.labelnames, labels))
+                if metric.kind != 'histogram':
+                    lines.append(f'{name}{_labels(pairs)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), value[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f'{name}_bucket{_labels(pairs + [("le", le)])} {_number(cumulative)}')
+                lines.append(f'{name}_sum{_labels(pairs)} {_number(value[-1])}')
+                lines.append(f'{name}_count{_labels(pairs)} {_number(cumulative)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _add(totals, key, value):
+    current = totals.get(key)
+    if current is None:
+        totals[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            current[i] += v
+    else:
+        totals[key] = current + value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.metric(
+    'agrisaarthi_http_request_duration_seconds', 'Request latency by route.', 'histogram',
+    ('route', 'method'), buckets=LATENCY_BUCKETS,
+)
+REQUESTS = registry.metric(
+    'agrisaarthi_http_requests_total', 'Requests by route and status code.', 'counter',
+    ('route', 'method', 'status'),
+)
+REQUESTS_IN_FLIGHT = registry.metric(
+    'agrisaarthi_http_requests_in_flight', 'Requests being handled right now.', 'gauge', live_only=True,
+)
+REQUEST_QUERIES = registry.metric(
+    'agrisaarthi_http_request_db_queries', 'SQL statements per request by route.', 'histogram',
+    ('route', 'method'), buckets=QUERY_BUCKETS,
+)
+UPSTREAM_LATENCY = registry.metric(
+    'agrisaarthi_upstream_request_duration_seconds', 'Upstream API call latency, per attempt.', 'histogram',
+    ('upstream',), buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = registry.metric(
+    'agrisaarthi_upstream_errors_total',
+    'Failed upstream API attempts by kind (timeout, connection, http_4xx, http_5xx).', 'counter',
+    ('upstream', 'kind'),
+)
+CACHE_REQUESTS = registry.metric(
+    'agrisaarthi_cache_requests_total', 'Cache lookups by result (hit, stale, miss).', 'counter',
+    ('cache', 'result'),
+)
+CACHE_HIT_RATIO = registry.metric(
+    'agrisaarthi_cache_hit_ratio', 'Share of cache lookups served from the cache (stale included).', 'gauge',
+    ('cache',),
+)
+
+
+def _cache_samples():
+    from .authentication import token_user_cache
+    from .utils.weather_cache import weather_cache
+
+    for name, cache, results in (
+        ('weather', weather_cache, (('hit', 'hits'), ('stale', 'stale'), ('miss', 'misses'))),
+        ('auth_token', token_user_cache, (('hit', 'hits'), ('miss', 'misses'))),
+    ):
+        for result, attribute in results:
+            yield CACHE_REQUESTS.name, (name, result), getattr(cache, attribute)
+
+
+registry.add_collector(_cache_samples)
+
+
+def _derived(by_name):
+    lookups = {}
+    for (cache, result), value in by_name.get(CACHE_REQUESTS.name, []):
+        counts = lookups.setdefault(cache, {})
+        counts[result] = counts.get(result, 0) + value
+    ratios = [
+        ((cache,), (total - counts.get('miss', 0)) / total)
+        for cache, counts in sorted(lookups.items())
+        if (total := sum(counts.values()))
+    ]
+    return {CACHE_HIT_RATIO.name: ratios}
+
+
+def observe_request(route, method, status, seconds, queries):
+    REQUEST_LATENCY.observe(seconds, route, method)
+    REQUESTS.inc(route, method, str(status))
+    REQUEST_QUERIES.observe(queries, route, method)
+    registry.maybe_write_snapshot()
+
+
+def observe_upstream(upstream, seconds, error=None):
+    UPSTREAM_LATENCY.observe(seconds, upstream)
+    if error:
+        UPSTREAM_ERRORS.inc(upstream, error)
+
+
+atexit.register(registry.write_snapshot)
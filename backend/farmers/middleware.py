@@ -0,0 +1,250 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from rest_framework import exceptions
+
+from . import metrics
+from .authentication import CachedTokenAuthentication
+from .timing import RequestTimings, _current
+from .views import is_admin
+
+logger = logging.getLogger('farmers.requests')
+slow_logger = logging.getLogger('farmers.requests.slow')
+profile_logger = logging.getLogger('farmers.profiling')
+
+# Profiling mode of requests picked by PROFILE_SAMPLE_RATE; unlike the header
+# values it cannot be sent by a client
+SAMPLED = object()
+
+
+class RequestTimingMiddleware:
+    """
+    Measure every request: SQL statements and time (on every database
+    alias), upstream API time, serializer time and the total.
+
+    Latency, status and SQL statement counts per route also feed the
+    Prometheus metrics in farmers.metrics.
+
+    The numbers go out as a ``Server-Timing`` header (shown in the browser's
+    network panel; ``Timing-Allow-Origin`` from SERVER_TIMING_ALLOW_ORIGIN
+    lets a cross-origin frontend read it), as one ``farmers.requests`` INFO line per request and,
+    past SLOW_REQUEST_MS or SLOW_REQUEST_QUERIES, as a ``farmers.requests.slow``
+    WARNING with a digest of the most expensive statements.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = getattr(settings, 'SERVER_TIMING_HEADER', True)
+        self.allow_origin = getattr(settings, 'SERVER_TIMING_ALLOW_ORIGIN', None)
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        self.slow_queries = getattr(settings, 'SLOW_REQUEST_QUERIES', 50)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total_ms = timings.elapsed * 1000
+        match = request.resolver_match
+        metrics.observe_request(
+            match.route if match else 'unmatched', request.method, response.status_code,
+            total_ms / 1000, timings.sql_count,
+        )
+        if self.header:
+            response['Server-Timing'] = self.server_timing(timings, total_ms)
+            if self.allow_origin:
+                response['Timing-Allow-Origin'] = self.allow_origin
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                'method=%s path=%s status=%s total_ms=%.1f db_queries=%d db_ms=%.1f upstream_ms=%.1f '
+                'serializer_ms=%.1f',
+                request.method, request.path, response.status_code, total_ms, timings.sql_count,
+                timings.sql_time * 1000, timings.phase_time['upstream'] * 1000,
+                timings.phase_time['serializer'] * 1000,
+            )
+        if total_ms >= self.slow_ms or timings.sql_count >= self.slow_queries:
+            self.log_slow(request, response, timings, total_ms)
+        return response
+
+    @staticmethod
+    def server_timing(timings, total_ms):
+        metrics = [f'db;dur={timings.sql_time * 1000:.1f};desc="{timings.sql_count} queries"']
+        if timings.phase_calls['upstream']:
+            metrics.append(
+                f'upstream;dur={timings.phase_time["upstream"] * 1000:.1f};'
+                f'desc="{timings.phase_calls["upstream"]} calls"'
+            )
+        if timings.phase_calls['serializer']:
+            metrics.append(f'serializer;dur={timings.phase_time["serializer"] * 1000:.1f}')
+        metrics.append(f'total;dur={total_ms:.1f}')
+        return ', '.join(metrics)
+
+    @staticmethod
+    def log_slow(request, response, timings, total_ms):
+        lines = [
+            f'{count}x {duration * 1000:.1f}ms {sql}'
+            for count, duration, sql in timings.top_statements()
+        ]
+        slow_logger.warning(
+            'Slow request %s %s status=%s total_ms=%.1f db_queries=%d db_ms=%.1f upstream_ms=%.1f\n%s',
+            request.method, request.get_full_path(), response.status_code, total_ms, timings.sql_count,
+            timings.sql_time * 1000, timings.phase_time['upstream'] * 1000, '\n'.join(lines),
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Run a request under cProfile.
+
+    Administrators opt in per request with the ``X-Profile`` header or the
+    ``?profile=`` query parameter: ``text`` replaces the response with the
+    report (sorted by cumulative time), any other value keeps the response
+    and stores the profile in PROFILE_DIR, named in the ``X-Profile``
+    response header. Independently, PROFILE_SAMPLE_RATE stores profiles of
+    that share of all requests. Untriggered requests cost two dict lookups
+    and, only if sampling is on, one random draw.
+
+    One request is profiled at a time; requests arriving meanwhile run
+    unprofiled. Under ASGI, untriggered requests stay on the event loop and
+    profiled ones are handled through the sync path, see ``__acall__``.
+    """
+    header = 'HTTP_X_PROFILE'
+    query_param = 'profile'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0.0)
+        self.directory = getattr(settings, 'PROFILE_DIR', None)
+        self.max_files = getattr(settings, 'PROFILE_MAX_FILES', 200)
+        self.report_lines = getattr(settings, 'PROFILE_REPORT_LINES', 60)
+        self._lock = threading.Lock()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.sync_get_response = async_to_sync(get_response)
+        else:
+            self.sync_get_response = get_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request, self.requested_mode(request))
+
+    async def __acall__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None:
+            return await self.get_response(request)
+        # cProfile only sees its own thread. Handled the sync way, the sync
+        # views and ORM calls of this request run on the thread that
+        # profiles them (async_to_sync sends them back to it).
+        return await sync_to_async(self.handle)(request, mode)
+
+    def requested_mode(self, request):
+        """The ``X-Profile`` / ``?profile=`` value, else ``SAMPLED`` or None."""
+        return request.META.get(self.header) or request.GET.get(self.query_param) or self.sample()
+
+    def sample(self):
+        return SAMPLED if self.sample_rate and random.random() < self.sample_rate else None
+
+    def handle(self, request, mode):
+        if mode is not None and mode is not SAMPLED and not self.is_admin(request):
+            mode = self.sample()
+        if mode is None:
+            return self.sync_get_response(request)
+        return self.profile(request, mode)
+
+    @staticmethod
+    def is_admin(request):
+        # Runs before DRF authenticates the view, so resolve the token here
+        # (usually a token_user_cache hit)
+        try:
+            result = CachedTokenAuthentication().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return False
+        return result is not None and is_admin(result[0])
+
+    def profile(self, request, mode):
+        if not self._lock.acquire(blocking=False):
+            response = self.sync_get_response(request)
+            if mode is not SAMPLED:
+                response['X-Profile'] = 'busy'
+            return response
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.sync_get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            self._lock.release()
+
+        if mode == 'text':
+            return HttpResponse(self.report(profiler), content_type='text/plain; charset=utf-8')
+        name = self.store(request, profiler)
+        if mode is not SAMPLED and name:
+            response['X-Profile'] = name
+        return response
+
+    def report(self, profiler):
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(self.report_lines)
+        return stream.getvalue()
+
+    def store(self, request, profiler):
+        """Write ``<time>-<method>-<path>-<id>.prof`` (pstats format) and prune old files."""
+        if not self.directory:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')[:60] or 'root'
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{slug}-{uuid.uuid4().hex[:8]}.prof"
+        profiler.dump_stats(os.path.join(self.directory, name))
+        profile_logger.info("Stored profile of %s %s as %s", request.method, request.path, name)
+
+        files = sorted(f for f in os.listdir(self.directory) if f.endswith('.prof'))
+        for old in files[:-self.max_files] if self.max_files else []:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass
+        return name
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:44
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Blog = apps.get_model('farmers', 'Blog')
+    Comment = apps.get_model('farmers', 'Comment')
+    Like = Blog.likes.through
+
+    def count_of(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(blog_id=OuterRef('pk'))
+                .order_by().values('blog_id').annotate(n=Count('*')).values('n'),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    Blog.objects.update(like_count=count_of(Like), comment_count=count_of(Comment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0005_blog_comment_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
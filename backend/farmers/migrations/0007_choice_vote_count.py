@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:46
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_counts(apps, schema_editor):
+    Choice = apps.get_model('farmers', 'Choice')
+    Vote = apps.get_model('farmers', 'Vote')
+    votes = (
+        Vote.objects.filter(choice_id=OuterRef('pk'))
+        .order_by().values('choice_id').annotate(n=Count('*')).values('n')
+    )
+    Choice.objects.update(vote_count=Coalesce(Subquery(votes, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0006_blog_like_count_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vote_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:46
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_stats(apps, schema_editor):
+    # A frozen copy of farmers.stats.recompute_stats as of this migration
+    StatCounter = apps.get_model('farmers', 'StatCounter')
+    User = apps.get_model('farmers', 'User')
+    Blog = apps.get_model('farmers', 'Blog')
+    Comment = apps.get_model('farmers', 'Comment')
+    GovernmentScheme = apps.get_model('farmers', 'GovernmentScheme')
+
+    rows = [
+        StatCounter(name='users', value=User.objects.count()),
+        StatCounter(name='blogs', value=Blog.objects.count()),
+        StatCounter(name='comments', value=Comment.objects.count()),
+        StatCounter(name='schemes', value=GovernmentScheme.objects.count()),
+    ]
+    for item in User.objects.order_by().values('role').annotate(n=Count('id')):
+        rows.append(StatCounter(name=f"users.role:{item['role'] or ''}", value=item['n']))
+    for name, model, field in (
+        ('users.new', User, 'date_joined'),
+        ('blogs.new', Blog, 'created_at'),
+        ('comments.new', Comment, 'created_at'),
+    ):
+        per_day = (
+            model.objects.order_by().annotate(day=TruncDate(field))
+            .values('day').annotate(n=Count('id'))
+        )
+        rows.extend(StatCounter(name=name, day=item['day'], value=item['n']) for item in per_day)
+    StatCounter.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0007_choice_vote_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('day', models.DateField(blank=True, null=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'day'), name='statcounter_name_day_uniq'), models.UniqueConstraint(condition=models.Q(('day__isnull', True)), fields=('name',), name='statcounter_total_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
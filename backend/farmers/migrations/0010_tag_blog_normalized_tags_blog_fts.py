@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:49
+
+from django.db import migrations, models
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS farmers_blog_fts USING fts5("
+        "content, tags, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO farmers_blog_fts (rowid, content, tags) SELECT id, content, tags FROM farmers_blog"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS farmers_blog_fts")
+
+
+def backfill_tags(apps, schema_editor):
+    Blog = apps.get_model('farmers', 'Blog')
+    Tag = apps.get_model('farmers', 'Tag')
+    tags = {}
+    for blog in Blog.objects.exclude(tags='').only('id', 'tags'):
+        names = []
+        for part in blog.tags.split(','):
+            name = part.strip().lstrip('#').lower()[:50]
+            if name and name not in names:
+                names.append(name)
+        for name in names:
+            if name not in tags:
+                tags[name], _ = Tag.objects.get_or_create(name=name)
+        blog.normalized_tags.set([tags[name] for name in names])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0009_user_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='normalized_tags',
+            field=models.ManyToManyField(blank=True, related_name='blogs', to='farmers.tag'),
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0010_tag_blog_normalized_tags_blog_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='governmentscheme',
+            name='criteria',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:45
+
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def backfill_external_ids(apps, schema_editor):
+    GovernmentScheme = apps.get_model('farmers', 'GovernmentScheme')
+    GovernmentScheme.objects.filter(external_id__isnull=True).update(
+        external_id=Concat(Value('scheme-'), Cast('id', CharField()))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0012_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='governmentscheme',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_external_ids, migrations.RunPython.noop),
+    ]
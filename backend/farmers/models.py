@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce, Lower
 
 
 ROLE_CHOICES = [
@@ -47,6 +49,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
+    # Profile ETag validator (farmers/etags.py)
+    updated_at = models.DateTimeField(auto_now=True)
     profile_image = models.ImageField(upload_to='profile_images/', blank=True, null=True)
 
     # Farmer fields
@@ -99,20 +103,80 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'phone'
     REQUIRED_FIELDS = ['name']
 
+    class Meta:
+        indexes = [
+            # Admin user listing: newest first, optionally filtered
+            models.Index(fields=['-date_joined', '-id'], name='user_joined_id_idx'),
+            models.Index(fields=['role', '-date_joined', '-id'], name='user_role_joined_idx'),
+            models.Index(fields=['state', 'district', '-date_joined', '-id'], name='user_region_joined_idx'),
+            models.Index(fields=['is_active', '-date_joined', '-id'], name='user_active_joined_idx'),
+            # Case-insensitive name prefix search
+            models.Index(Lower('name'), name='user_name_lower_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.role})"
 
 class GovernmentScheme(models.Model):
+    # Stable key from the source catalog, used by import_schemes to upsert
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     name = models.CharField(max_length=255)
     benefit = models.TextField()
     eligibility = models.TextField()
     docs = models.TextField(help_text="Required documents (comma-separated or description)")
     apply_url = models.URLField()
+    # Structured version of `eligibility` used for matching, e.g.
+    # {"states": ["Gujarat"], "crops": ["cotton"], "farming_types": ["organic"],
+    #  "min_farm_size": 0, "max_farm_size": 5}. Missing keys mean "no restriction";
+    # farm sizes are in acres.
+    criteria = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Schemes entered through the admin or the API get the same
+        # "scheme-<id>" key migration 0013 gave existing rows, so an
+        # export of the catalog always imports back
+        if not self.external_id:
+            self.external_id = None
+        super().save(*args, **kwargs)
+        if self.external_id is None:
+            self.external_id = f'scheme-{self.pk}'
+            GovernmentScheme.objects.filter(pk=self.pk).update(external_id=self.external_id)
+
+
+
+
+class BlogQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Everything BlogSerializer reads, loaded in a constant number of queries."""
+        return self.select_related('author', 'poll').prefetch_related('poll__choices')
 
+    def with_actual_counts(self):
+        """Annotate the real like/comment totals, for checking the denormalized counters."""
+        return self.annotate(
+            actual_like_count=_count_per_blog(Blog.likes.through),
+            actual_comment_count=_count_per_blog(Comment),
+        )
+
+    def repair_counters(self):
+        """Overwrite the denormalized counters with the real totals in a single UPDATE."""
+        return self.update(
+            like_count=_count_per_blog(Blog.likes.through),
+            comment_count=_count_per_blog(Comment),
+        )
+
+
+def _count_per_blog(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(blog_id=OuterRef('pk'))
+            .order_by().values('blog_id').annotate(n=models.Count('*')).values('n'),
+            output_field=models.IntegerField(),
+        ),
+        0,
+    )
 
 
 # User = get_user_model()
@@ -126,15 +190,46 @@ class Blog(models.Model):
     poll = models.OneToOneField('Poll', on_delete=models.SET_NULL, null=True, blank=True, related_name='blog')
     visibility = models.CharField(max_length=10, choices=[('public', 'Public'), ('followers', 'Followers Only')], default='public')
     tags = models.CharField(max_length=255, blank=True)
+    # Indexed copy of `tags`, kept in sync by farmers/signals.py
+    normalized_tags = models.ManyToManyField('Tag', related_name='blogs', blank=True)
+    # Denormalized counters, updated with F() expressions by the like and
+    # comment views; `manage.py repair_blog_counters` fixes any drift.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    objects = BlogQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='blog_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"Post by {self.author.name} on {self.created_at.date()}"
 
     def likes_count(self):
-        return self.likes.count()
+        return self.like_count
+
 
 
 
+class Tag(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def normalize(raw):
+        """Split a comma-separated tag string into unique, lowercased names."""
+        names = []
+        for part in (raw or '').split(','):
+            name = part.strip().lstrip('#').lower()[:50]
+            if name and name not in names:
+                names.append(name)
+        return names
+
 
 class Poll(models.Model):
     question = models.CharField(max_length=255)
@@ -148,6 +243,8 @@ class Poll(models.Model):
 class Choice(models.Model):
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='choices')
     choice_text = models.CharField(max_length=200)
+    # Materialized tally, incremented in the same transaction as each Vote
+    vote_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.choice_text
@@ -167,5 +264,34 @@ class Comment(models.Model):
     content = models.TextField(max_length=300)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['blog', '-created_at', '-id'], name='comment_blog_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.name} on Blog #{self.blog.id}"
+
+
+class StatCounter(models.Model):
+    """
+    Incrementally maintained dashboard counter, see farmers/stats.py.
+
+    Rows with ``day=None`` hold running totals (``users``,
+    ``users.role:farmer``...); dated rows hold per-day activity
+    (``users.new``, ``blogs.new``, ``comments.new``).
+    """
+    name = models.CharField(max_length=64)
+    day = models.DateField(null=True, blank=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'day'], name='statcounter_name_day_uniq'),
+            models.UniqueConstraint(
+                fields=['name'], condition=models.Q(day__isnull=True), name='statcounter_total_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name}@{self.day or 'total'} = {self.value}"
@@ -0,0 +1,94 @@
+from django.db import connection
+
+from .models import Blog, Tag
+
+# SQLite FTS5 index over Blog.content and Blog.tags. The table is created by
+# migration 0010 and kept in sync from the Blog save/delete signals.
+FTS_TABLE = 'farmers_blog_fts'
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def index_blog(blog):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [blog.id])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, content, tags) VALUES (%s, %s, %s)",
+            [blog.id, blog.content, blog.tags],
+        )
+
+
+def unindex_blog(blog_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [blog_id])
+
+
+def rebuild_index():
+    """Re-index every blog, e.g. after rows were written with bulk_create()."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"INSERT INTO {FTS_TABLE} (rowid, content, tags) SELECT id, content, tags FROM farmers_blog")
+
+
+def sync_blog_tags(blog):
+    """Point ``blog.normalized_tags`` at the Tag rows named in ``blog.tags``."""
+    names = Tag.normalize(blog.tags)
+    existing = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [Tag(name=name) for name in names if name not in existing]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    blog.normalized_tags.set([existing[name] for name in names])
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix so results appear while the user is still typing.
+    """
+    words = [word.replace('"', '""') for word in query.split()]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_blog_ids(query, tag=None, limit=20, offset=0):
+    """
+    Ids of the blogs matching ``query``, best match first (BM25).
+
+    Falls back to a case-insensitive substring match ordered by recency on
+    databases without FTS5.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return []
+
+    if not fts_available():
+        blogs = Blog.objects.filter(content__icontains=query.strip())
+        if tag:
+            blogs = blogs.filter(normalized_tags__name=tag)
+        return list(blogs.order_by('-created_at', '-id').values_list('id', flat=True)[offset:offset + limit])
+
+    sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+    params = [expression]
+    if tag:
+        sql += (
+            " AND rowid IN (SELECT bt.blog_id FROM farmers_blog_normalized_tags bt"
+            " JOIN farmers_tag t ON t.id = bt.tag_id WHERE t.name = %s)"
+        )
+        params.append(tag)
+    sql += f" ORDER BY bm25({FTS_TABLE}) LIMIT %s OFFSET %s"
+    params.extend([limit, offset])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
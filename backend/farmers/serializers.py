@@ -1,6 +1,18 @@
+from django.db import models
 from rest_framework import serializers
 from .models import User, GovernmentScheme
+from .eligibility import CRITERIA_LIST_KEYS, CRITERIA_SIZE_KEYS
 from .models import Blog, Comment, Poll, Choice, Vote
+from .timing import timed
+
+
+class TimedSerializerMixin:
+    """Count ``to_representation`` towards the request's serializer time (see RequestTimingMiddleware)."""
+
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -16,54 +28,168 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
-class UserProfileSerializer(serializers.ModelSerializer):
+COMMON_PROFILE_FIELDS = [
+    'id', 'phone', 'email', 'name', 'role', 'is_active', 'is_staff',
+    'date_joined', 'profile_image',
+    # Location and language are shown on every role's profile card
+    'state', 'district', 'village', 'preferred_language',
+]
+
+ROLE_PROFILE_FIELDS = {
+    'farmer': [
+        'type_of_farming', 'main_crops', 'farm_size', 'voice_input_access', 'receive_govt_alerts',
+    ],
+    'expert_advisor': [
+        'expertise_area', 'experience_years', 'state_of_operation', 'languages_spoken', 'available_for_consult', 'certificates',
+    ],
+    'administrator': [
+        'designation', 'region_of_responsibility', 'access_level', 'employee_id',
+    ],
+    'government_official': [
+        'department_name', 'official_email', 'gov_designation', 'schemes_managed', 'gov_id_badge', 'portal_access_required',
+    ],
+    'retailer': [
+        'business_name', 'location', 'type_of_business', 'interested_crops', 'license_gst_number', 'buyer_dashboard_access',
+    ],
+}
+
+
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Full profile of a user.
+
+    Pass ``fields`` (usually from ``projection``) to serialize only those
+    field names.
+    """
+
     class Meta:
         model = User
-        fields = [
-            'id', 'phone', 'email', 'name', 'role', 'is_active', 'is_staff',
-            'date_joined', 'profile_image',
-            # Farmer fields
-            'state', 'district', 'village', 'preferred_language', 'type_of_farming', 'main_crops', 'farm_size', 'voice_input_access', 'receive_govt_alerts',
-            # Expert Advisor fields
-            'expertise_area', 'experience_years', 'state_of_operation', 'languages_spoken', 'available_for_consult', 'certificates',
-            # Administrator fields
-            'designation', 'region_of_responsibility', 'access_level', 'employee_id',
-            # Government Official fields
-            'department_name', 'official_email', 'gov_designation', 'schemes_managed', 'gov_id_badge', 'portal_access_required',
-            # Retailer fields
-            'business_name', 'location', 'type_of_business', 'interested_crops', 'license_gst_number', 'buyer_dashboard_access',
+        fields = COMMON_PROFILE_FIELDS + [
+            field for role_fields in ROLE_PROFILE_FIELDS.values() for field in role_fields
         ]
         read_only_fields = ['id', 'date_joined']
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            keep = set(fields)
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+    @classmethod
+    def projection(cls, fields=None, omit=None, role=None):
+        """
+        Field names to serialize, in declaration order.
+
+        ``role`` limits the output to the common fields plus that role's
+        fields; an empty or unknown role keeps everything (users who have
+        not picked a role yet). ``fields`` and ``omit`` are iterables of
+        names that are then kept or removed. The result doubles as the
+        column list for ``QuerySet.only()``.
+        """
+        names = list(cls.Meta.fields)
+        if role in ROLE_PROFILE_FIELDS:
+            allowed = set(COMMON_PROFILE_FIELDS) | set(ROLE_PROFILE_FIELDS[role])
+            names = [name for name in names if name in allowed]
+        if fields is not None:
+            wanted = set(fields)
+            names = [name for name in names if name in wanted]
+        if omit is not None:
+            unwanted = set(omit)
+            names = [name for name in names if name not in unwanted]
+        return names
+
+    @classmethod
+    def projection_from_request(cls, request, role=None):
+        """``projection`` driven by the ``?fields=a,b`` / ``?omit=c`` query parameters."""
+        def names(param):
+            value = request.query_params.get(param)
+            return [name.strip() for name in value.split(',') if name.strip()] if value else None
+
+        return cls.projection(fields=names('fields'), omit=names('omit'), role=role)
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
         # Fill missing fields with empty string for frontend compatibility
-        for field in self.Meta.fields:
-            if field not in data or data[field] is None:
+        for field, value in data.items():
+            if value is None:
                 data[field] = ""
         return data
 
-class GovernmentSchemeSerializer(serializers.ModelSerializer):
+class AdminUserListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = [
+            'id', 'phone', 'name', 'email', 'role', 'is_active', 'is_staff', 'date_joined',
+            'profile_image', 'state', 'district', 'village',
+        ]
+        read_only_fields = fields
+
+class GovernmentSchemeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = GovernmentScheme
         fields = '__all__' 
 
+    def validate_criteria(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object.')
+        unknown = set(value) - set(CRITERIA_LIST_KEYS) - set(CRITERIA_SIZE_KEYS)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown keys: {', '.join(sorted(unknown))}.")
+        for key in CRITERIA_LIST_KEYS:
+            if key in value and not (
+                isinstance(value[key], list) and all(isinstance(item, str) for item in value[key])
+            ):
+                raise serializers.ValidationError(f'{key} must be a list of strings.')
+        for key in CRITERIA_SIZE_KEYS:
+            if value.get(key) is not None and (
+                isinstance(value[key], bool) or not isinstance(value[key], (int, float))
+            ):
+                raise serializers.ValidationError(f'{key} must be a number.')
+        return value
+
 
 
 
 
 # --- Poll System ---
+def voted_poll_ids(user, poll_ids):
+    """Ids among ``poll_ids`` that ``user`` has voted in."""
+    if not user.is_authenticated or not poll_ids:
+        return set()
+    return set(
+        Vote.objects.filter(voted_by=user, poll_id__in=poll_ids).values_list('poll_id', flat=True)
+    )
+
+
 class ChoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Choice
-        fields = ['id', 'choice_text']
+        fields = ['id', 'choice_text', 'vote_count']
+        read_only_fields = ['vote_count']
 
-class PollSerializer(serializers.ModelSerializer):
+class PollSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     choices = ChoiceSerializer(many=True)
+    total_votes = serializers.SerializerMethodField()
+    has_voted = serializers.SerializerMethodField()
 
     class Meta:
         model = Poll
-        fields = ['id', 'question', 'choices', 'created_by', 'created_at']
+        fields = ['id', 'question', 'choices', 'total_votes', 'has_voted', 'created_by', 'created_at']
+
+    def get_total_votes(self, obj):
+        # Summed in Python so prefetched choices are reused
+        return sum(choice.vote_count for choice in obj.choices.all())
+
+    def get_has_voted(self, obj):
+        voted = self.context.get('voted_poll_ids')
+        if voted is None:
+            request = self.context.get('request')
+            if request is None:
+                return False
+            voted = voted_poll_ids(request.user, [obj.id])
+        return obj.id in voted
 
     def create(self, validated_data):
         choices_data = validated_data.pop('choices')
@@ -73,23 +199,54 @@ class PollSerializer(serializers.ModelSerializer):
         return poll
 
 # --- Blog ---
-class BlogSerializer(serializers.ModelSerializer):
+def saved_blog_ids(user, blog_ids=None):
+    """Ids of the blogs ``user`` has saved, optionally limited to ``blog_ids``."""
+    if not user.is_authenticated:
+        return set()
+    saved = user.saved_posts.all()
+    if blog_ids is not None:
+        saved = saved.filter(id__in=blog_ids)
+    return set(saved.values_list('id', flat=True))
+
+
+class BlogListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    def to_representation(self, data):
+        blogs = list(data.all() if isinstance(data, models.Manager) else data)
+        # One lookup for the whole page instead of one per post
+        if 'request' in self.context:
+            user = self.context['request'].user
+            if 'saved_blog_ids' not in self.context:
+                self.context['saved_blog_ids'] = saved_blog_ids(user, [blog.id for blog in blogs])
+            if 'voted_poll_ids' not in self.context:
+                self.context['voted_poll_ids'] = voted_poll_ids(
+                    user, [blog.poll_id for blog in blogs if blog.poll_id]
+                )
+        return super().to_representation(blogs)
+
+
+class BlogSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author_name = serializers.CharField(source='author.name', read_only=True)
-    likes_count = serializers.IntegerField(source='likes.count', read_only=True)
+    likes_count = serializers.IntegerField(source='like_count', read_only=True)
     poll = PollSerializer(required=False, allow_null=True)
     is_saved = serializers.SerializerMethodField()
 
     def get_is_saved(self, obj):
-        user = self.context['request'].user
-        return user.is_authenticated and obj in user.saved_posts.all()
+        saved = self.context.get('saved_blog_ids')
+        if saved is None:
+            request = self.context.get('request')
+            if request is None:
+                return False
+            saved = saved_blog_ids(request.user, [obj.id])
+        return obj.id in saved
 
     class Meta:
+        list_serializer_class = BlogListSerializer
         model = Blog
         fields = [
             'id', 'author', 'author_name', 'content', 'image', 'created_at',
-            'updated_at', 'likes_count', 'poll', 'visibility', 'tags','is_saved'
+            'updated_at', 'likes_count', 'comment_count', 'poll', 'visibility', 'tags','is_saved'
         ]
-        read_only_fields = ['author', 'author_name', 'likes_count', 'created_at', 'updated_at','is_saved']
+        read_only_fields = ['author', 'author_name', 'likes_count', 'comment_count', 'created_at', 'updated_at','is_saved']
 
     def create(self, validated_data):
         poll_data = validated_data.pop('poll', None)
@@ -113,7 +270,7 @@ class BlogSerializer(serializers.ModelSerializer):
 
 
 # --- Comment ---
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author_name = serializers.CharField(source='author.name', read_only=True)
 
     class Meta:
@@ -124,6 +281,13 @@ class CommentSerializer(serializers.ModelSerializer):
 
 # --- Vote ---
 class VoteSerializer(serializers.ModelSerializer):
+    voted_by = serializers.HiddenField(default=serializers.CurrentUserDefault())
+
     class Meta:
         model = Vote
         fields = ['poll', 'choice', 'voted_by']
+
+    def validate(self, attrs):
+        if attrs['choice'].poll_id != attrs['poll'].id:
+            raise serializers.ValidationError({'choice': 'Choice does not belong to this poll.'})
+        return attrs
@@ -0,0 +1,133 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import search, stats
+from .authentication import token_user_cache
+from .eligibility import scheme_index
+from .utils.pdf_cache import blog_pdf_cache
+from .versions import bump_version
+from .models import Blog, Comment, GovernmentScheme, User
+
+
+def _day(value):
+    return timezone.localdate(value) if value else timezone.localdate()
+
+
+# --- Dashboard counters (farmers/stats.py) ---
+
+@receiver(post_init, sender=User)
+def remember_user_role(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred role does not trigger a query
+    instance._stats_role = instance.__dict__.get('role')
+
+
+@receiver(post_save, sender=User)
+def count_user_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(stats.TOTAL_USERS)
+        stats.bump(stats.role_counter(instance.role))
+        stats.bump(stats.NEW_USERS, day=_day(instance.date_joined))
+    else:
+        old_role = getattr(instance, '_stats_role', None)
+        new_role = instance.__dict__.get('role')
+        if old_role is not None and new_role is not None and old_role != new_role:
+            stats.bump(stats.role_counter(old_role), -1)
+            stats.bump(stats.role_counter(new_role))
+    instance._stats_role = instance.__dict__.get('role')
+
+
+@receiver(post_delete, sender=User)
+def count_user_deleted(sender, instance, **kwargs):
+    stats.bump(stats.TOTAL_USERS, -1)
+    role = getattr(instance, '_stats_role', None)
+    if role is not None:
+        stats.bump(stats.role_counter(role), -1)
+
+
+@receiver(post_save, sender=Blog)
+def count_blog_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(stats.TOTAL_BLOGS)
+        stats.bump(stats.NEW_BLOGS, day=_day(instance.created_at))
+
+
+@receiver(post_delete, sender=Blog)
+def count_blog_deleted(sender, instance, **kwargs):
+    stats.bump(stats.TOTAL_BLOGS, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(stats.TOTAL_COMMENTS)
+        stats.bump(stats.NEW_COMMENTS, day=_day(instance.created_at))
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_deleted(sender, instance, **kwargs):
+    stats.bump(stats.TOTAL_COMMENTS, -1)
+
+
+@receiver(post_save, sender=GovernmentScheme)
+def count_scheme_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(stats.TOTAL_SCHEMES)
+
+
+@receiver(post_delete, sender=GovernmentScheme)
+def count_scheme_deleted(sender, instance, **kwargs):
+    stats.bump(stats.TOTAL_SCHEMES, -1)
+
+
+# --- Blog search index and normalized tags (farmers/search.py) ---
+
+@receiver(post_init, sender=Blog)
+def remember_blog_text(sender, instance, **kwargs):
+    instance._indexed_text = (instance.__dict__.get('content'), instance.__dict__.get('tags'))
+
+
+@receiver(post_save, sender=Blog)
+def index_blog_saved(sender, instance, created, **kwargs):
+    old_content, old_tags = getattr(instance, '_indexed_text', (None, None))
+    if created or old_content != instance.content or old_tags != instance.tags:
+        search.index_blog(instance)
+    if instance.tags if created else old_tags != instance.tags:
+        search.sync_blog_tags(instance)
+    instance._indexed_text = (instance.content, instance.tags)
+
+
+@receiver(post_delete, sender=Blog)
+def index_blog_deleted(sender, instance, **kwargs):
+    search.unindex_blog(instance.id)
+
+
+# --- Cached blog PDFs (farmers/utils/pdf_cache.py) ---
+
+@receiver(post_delete, sender=Blog)
+def discard_blog_pdfs(sender, instance, **kwargs):
+    blog_pdf_cache.discard(instance.id)
+
+
+# --- Scheme catalog version and eligibility index (farmers/eligibility.py) ---
+
+@receiver(post_save, sender=GovernmentScheme)
+@receiver(post_delete, sender=GovernmentScheme)
+def scheme_changed(sender, instance, **kwargs):
+    bump_version('schemes')
+    scheme_index.invalidate()
+
+
+# --- Cached token authentication (farmers/authentication.py) ---
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    token_user_cache.invalidate_key(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def token_user_changed(sender, instance, **kwargs):
+    token_user_cache.invalidate_user(instance.pk)
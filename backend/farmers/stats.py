@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# Counter names kept by the signal handlers in farmers/signals.py
+TOTAL_USERS = 'users'
+TOTAL_BLOGS = 'blogs'
+TOTAL_COMMENTS = 'comments'
+TOTAL_SCHEMES = 'schemes'
+ROLE_PREFIX = 'users.role:'
+NEW_USERS = 'users.new'
+NEW_BLOGS = 'blogs.new'
+NEW_COMMENTS = 'comments.new'
+
+GROWTH_SERIES = {
+    'users': NEW_USERS,
+    'blogs': NEW_BLOGS,
+    'comments': NEW_COMMENTS,
+}
+
+
+def role_counter(role):
+    return f"{ROLE_PREFIX}{role or ''}"
+
+
+def bump(name, delta=1, day=None):
+    """Atomically add ``delta`` to a counter, creating the row on first use."""
+    from .models import StatCounter
+
+    if StatCounter.objects.filter(name=name, day=day).update(value=F('value') + delta):
+        return
+    try:
+        with transaction.atomic():
+            StatCounter.objects.create(name=name, day=day, value=delta)
+    except IntegrityError:
+        # Another writer created the row first
+        StatCounter.objects.filter(name=name, day=day).update(value=F('value') + delta)
+
+
+def recompute_stats():
+    """
+    Rebuild every counter from the source tables.
+
+    This is the only place that scans the tables; it backs the admin
+    "recompute" action (migration 0008 keeps its own frozen copy).
+    """
+    from .models import Blog, Comment, GovernmentScheme, StatCounter, User
+
+    rows = [
+        StatCounter(name=TOTAL_USERS, value=User.objects.count()),
+        StatCounter(name=TOTAL_BLOGS, value=Blog.objects.count()),
+        StatCounter(name=TOTAL_COMMENTS, value=Comment.objects.count()),
+        StatCounter(name=TOTAL_SCHEMES, value=GovernmentScheme.objects.count()),
+    ]
+    for item in User.objects.order_by().values('role').annotate(n=Count('id')):
+        rows.append(StatCounter(name=role_counter(item['role']), value=item['n']))
+    for name, model, field in (
+        (NEW_USERS, User, 'date_joined'),
+        (NEW_BLOGS, Blog, 'created_at'),
+        (NEW_COMMENTS, Comment, 'created_at'),
+    ):
+        per_day = (
+            model.objects.order_by().annotate(day=TruncDate(field))
+            .values('day').annotate(n=Count('id'))
+        )
+        rows.extend(StatCounter(name=name, day=item['day'], value=item['n']) for item in per_day)
+
+    with transaction.atomic():
+        # Table version counters (farmers/versions.py) are not derived data
+        StatCounter.objects.exclude(name__startswith='version:').delete()
+        StatCounter.objects.bulk_create(rows)
+
+
+def _bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def growth_series(days=30, bucket='day'):
+    """
+    New users, blogs and comments per day/week/month over the last ``days`` days.
+
+    Built from the dated counter rows only, so it costs one small query no
+    matter how large the source tables are.
+    """
+    from .models import StatCounter
+
+    today = timezone.now().date()
+    since = today - timedelta(days=days - 1)
+    buckets = []
+    day = since
+    while day <= today:
+        start = _bucket_start(day, bucket)
+        if not buckets or buckets[-1] != start:
+            buckets.append(start)
+        day += timedelta(days=1)
+
+    series = {key: dict.fromkeys(buckets, 0) for key in GROWTH_SERIES}
+    by_counter = {name: key for key, name in GROWTH_SERIES.items()}
+    rows = StatCounter.objects.filter(
+        name__in=by_counter, day__gte=since, day__lte=today
+    ).values_list('name', 'day', 'value')
+    for name, day, value in rows:
+        series[by_counter[name]][_bucket_start(day, bucket)] += value
+
+    return {
+        key: [{'date': start.isoformat(), 'count': count} for start, count in points.items()]
+        for key, points in series.items()
+    }
+
+
+def dashboard_stats():
+    from .models import StatCounter
+
+    totals = {}
+    users_by_role = {}
+    for name, value in StatCounter.objects.filter(day__isnull=True).values_list('name', 'value'):
+        if name.startswith(ROLE_PREFIX):
+            if value:
+                users_by_role[name[len(ROLE_PREFIX):]] = value
+        else:
+            totals[name] = value
+
+    return {
+        'totalUsers': totals.get(TOTAL_USERS, 0),
+        'totalBlogs': totals.get(TOTAL_BLOGS, 0),
+        'totalComments': totals.get(TOTAL_COMMENTS, 0),
+        'totalSchemes': totals.get(TOTAL_SCHEMES, 0),
+        'usersByRole': users_by_role,
+    }
@@ -1,3 +1,1018 @@
-from django.test import TestCase
+import asyncio
+import gc
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.db import connection
+from django.db.models import F
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_user_cache
+from .db import ReadReplicaMiddleware, ReadReplicaRouter
+from .eligibility import SchemeEligibilityIndex, scheme_index
+from .management.commands.bench_api import percentile
+from .metrics import REQUESTS, REQUESTS_IN_FLIGHT, Registry, registry
+from .middleware import RequestTimingMiddleware
+from .management.commands.import_farmers import Command as ImportFarmersCommand
+from .models import Blog, Choice, GovernmentScheme, Poll, User
+from .search import search_blog_ids
+from .stats import dashboard_stats
+from .timing import RequestTimings, _current, digest_sql, timed
+from .versions import get_version
+from .utils.market_prices import MarketPriceSnapshot, market_price_store
+from .utils.pdf_cache import PdfRenderError, blog_pdf_cache
+from .utils.upstream import SingleFlight, UpstreamClient, UpstreamResponse
+from .utils.upstream_stub import StubBehaviour, make_server, parse_latency
+from .utils.weather_cache import weather_cache
+from .utils.weather_cache import WeatherCache, grid_cell
+
+
+def authenticated_user(phone, name, **fields):
+    """Create a user and return it with the request headers authenticating as them."""
+    user = User.objects.create_user(phone=phone, name=name, password='x', **fields)
+    return user, {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+
+
+def warm_token_cache(client, auth):
+    # Authenticate once so query counts below exclude the token lookup
+    client.get('/api/profile/', **auth)
+
+
+class MarketPriceSnapshotTests(TestCase):
+    records = [
+        {'State': 'Gujarat', 'District': 'Anand', 'Commodity': 'Onion'},
+        {'State': 'Gujarat', 'District': 'Anand', 'Commodity': 'Green Onion'},
+        {'State': 'Gujarat', 'District': 'Surat', 'Commodity': 'Onion'},
+        {'State': 'Punjab', 'District': 'Anand', 'Commodity': 'Wheat'},
+    ]
+
+    def setUp(self):
+        self.snapshot = MarketPriceSnapshot(self.records)
+
+    def test_filters_match_linear_scan(self):
+        self.assertEqual(
+            self.snapshot.filter(state='gujarat', district='ANAND'),
+            self.records[:2],
+        )
+        self.assertEqual(self.snapshot.filter(district='anand'), [self.records[0], self.records[1], self.records[3]])
+        self.assertEqual(self.snapshot.filter(), self.records)
+
+    def test_commodity_is_substring_match(self):
+        self.assertEqual(self.snapshot.filter(commodity='onion'), self.records[:3])
+        self.assertEqual(self.snapshot.filter(state='gujarat', commodity='green'), [self.records[1]])
+        self.assertEqual(self.snapshot.filter(commodity='rice'), [])
+
+
+@override_settings(WEATHER_CACHE_TTLS={'current': 60}, WEATHER_CACHE_STALE_SECONDS=60)
+class WeatherCacheTests(TestCase):
+    def test_nearby_coordinates_share_a_cell(self):
+        self.assertEqual(grid_cell('22.5641', '72.9289'), grid_cell('22.5612', '72.9311'))
+
+    def test_hit_miss_and_stale_while_revalidate(self):
+        cache = WeatherCache()
+        fetch = mock.Mock(side_effect=['first', 'second'])
+        with mock.patch('farmers.utils.weather_cache.time.monotonic', return_value=0):
+            self.assertEqual(cache.get_or_fetch('current', 1.0, 2.0, fetch), 'first')
+        with mock.patch('farmers.utils.weather_cache.time.monotonic', return_value=30):
+            self.assertEqual(cache.get_or_fetch('current', 1.0, 2.0, fetch), 'first')
+        with mock.patch('farmers.utils.weather_cache.time.monotonic', return_value=90), \
+                mock.patch('farmers.utils.weather_cache.threading.Thread') as thread:
+            self.assertEqual(cache.get_or_fetch('current', 1.0, 2.0, fetch), 'first')
+            thread.assert_called_once()
+        stats = cache.stats()
+        self.assertEqual((stats['misses'], stats['hits'], stats['stale']), (1, 1, 1))
+
+
+class SingleFlightTests(TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        group = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return 'payload'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(group.do('key', fetch)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for _ in range(500):
+            if group.coalesced == 4:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['payload'] * 5)
+
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        group = SingleFlight()
+        started = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            if len(calls) == 1:
+                started.set()
+                await asyncio.sleep(10)
+            await asyncio.sleep(0)
+            return 'payload'
+
+        leader = asyncio.create_task(group.ado('key', fetch))
+        await started.wait()
+        followers = [asyncio.create_task(group.ado('key', fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        self.assertEqual(await asyncio.gather(*followers), ['payload'] * 3)
+        self.assertTrue(leader.cancelled())
+        self.assertEqual(len(calls), 2)
+
+
+class UpstreamClientTests(TestCase):
+    def test_retries_and_adds_api_key(self):
+        client = UpstreamClient('stub', 'http://127.0.0.1:9/', api_key='k', api_key_param='appid', retries=2, backoff=0)
+        busy = mock.Mock(status_code=503, url='http://127.0.0.1:9/x')
+        ok = mock.Mock(status_code=200, url='http://127.0.0.1:9/x')
+        ok.json.return_value = {'ok': True}
+        with mock.patch.object(client.session, 'get', side_effect=[busy, ok]) as get:
+            resp = client.get_json('x', params={'q': 1})
+        self.assertEqual(resp.data, {'ok': True})
+        self.assertEqual(get.call_count, 2)
+        get.assert_called_with('http://127.0.0.1:9/x', params={'q': 1, 'appid': 'k'}, timeout=10)
+
+
+class AsyncViewParityTests(TestCase):
+    def setUp(self):
+        _, self.auth = authenticated_user(phone='9000000001', name='Asha')
+        weather_cache.clear()
+        self.addCleanup(weather_cache.clear)
+
+    def test_sync_and_async_weather_match(self):
+        reply = UpstreamResponse('http://stub/', 200, {'name': 'Anand', 'main': {'temp': 31.5}})
+        client = mock.Mock()
+        client.get_json.return_value = reply
+        client.aget_json = mock.AsyncMock(return_value=reply)
+        with mock.patch('farmers.utils.weather.get_client', return_value=client):
+            sync = self.client.get('/api/weather/', {'lat': '22.56', 'lon': '72.93'}, **self.auth)
+            weather_cache.clear()
+            asynchronous = self.client.get('/api/weather/async/', {'lat': '22.56', 'lon': '72.93'}, **self.auth)
+        self.assertEqual(sync.status_code, 200)
+        self.assertEqual(sync.content, asynchronous.content)
+        client.aget_json.assert_awaited_once()
+
+    async def test_middleware_stack_stays_async(self):
+        # RequestTimingMiddleware is outermost: it only runs its coroutine
+        # branch when nothing below it forces the sync adapter
+        entered = []
+        acall = RequestTimingMiddleware.__acall__
+
+        async def spy(middleware, request):
+            entered.append(request.path)
+            return await acall(middleware, request)
+
+        client = mock.Mock()
+        client.aget_json = mock.AsyncMock(return_value=UpstreamResponse('http://stub/', 200, {'name': 'Anand'}))
+        with mock.patch.object(RequestTimingMiddleware, '__acall__', spy), \
+                mock.patch('farmers.utils.weather.get_client', return_value=client):
+            response = await self.async_client.get(
+                '/api/weather/async/', {'lat': '22.56', 'lon': '72.93'}, AUTHORIZATION=self.auth['HTTP_AUTHORIZATION'],
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(entered, ['/api/weather/async/'])
+
+    def test_async_view_requires_token(self):
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Token'}, {'HTTP_AUTHORIZATION': 'Token nope'}):
+            sync = self.client.get('/api/weather/', {'lat': '1', 'lon': '2'}, **headers)
+            asynchronous = self.client.get('/api/weather/async/', {'lat': '1', 'lon': '2'}, **headers)
+            self.assertEqual((sync.status_code, sync.content), (asynchronous.status_code, asynchronous.content))
+
+    def test_async_view_honours_logout(self):
+        self.client.get('/api/weather/async/', {'lat': '1', 'lon': '2'}, **self.auth)
+        self.client.post('/api/logout/', **self.auth)
+        response = self.client.get('/api/weather/async/', {'lat': '1', 'lon': '2'}, **self.auth)
+        self.assertEqual(response.status_code, 401)
+
+
+class BlogFeedQueryCountTests(TestCase):
+    def setUp(self):
+        self.user, self.auth = authenticated_user(phone='9000000002', name='Ravi')
+
+    def add_posts(self, count):
+        for i in range(count):
+            author = User.objects.create_user(phone=f'91{Blog.objects.count():08d}', name=f'Author {i}')
+            poll = Poll.objects.create(question='Sow now?', created_by=author)
+            Choice.objects.bulk_create([Choice(poll=poll, choice_text='Yes'), Choice(poll=poll, choice_text='No')])
+            blog = Blog.objects.create(author=author, content='Rain expected', poll=poll, like_count=2)
+            blog.likes.add(self.user, author)
+            self.user.saved_posts.add(blog)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        # blogs, poll choices, saved ids, voted poll ids
+        self.add_posts(2)
+        warm_token_cache(self.client, self.auth)
+        with self.assertNumQueries(4):
+            small = self.client.get('/api/blogs/', **self.auth)
+        self.add_posts(5)
+        with self.assertNumQueries(4):
+            large = self.client.get('/api/blogs/', **self.auth)
+        self.assertEqual(len(small.json()['results']), 2)
+        self.assertEqual(len(large.json()['results']), 7)
+        self.assertTrue(all(post['is_saved'] and post['likes_count'] == 2 for post in large.json()['results']))
+
+    def test_saved_posts_query_count(self):
+        self.add_posts(3)
+        warm_token_cache(self.client, self.auth)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/blogs/saved/', **self.auth)
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_cursor_pages_are_stable_under_inserts(self):
+        self.add_posts(5)
+        first = self.client.get('/api/blogs/', {'page_size': 2}, **self.auth).json()
+        self.add_posts(1)
+        second = self.client.get(first['next'], **self.auth).json()
+        rest = self.client.get(second['next'], **self.auth).json()
+        ids = [post['id'] for page in (first, second, rest) for post in page['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 5)
+        self.assertIsNone(rest['next'])
+
+
+class BlogCounterTests(TestCase):
+    def setUp(self):
+        self.user, self.auth = authenticated_user(phone='9000000003', name='Meena')
+        self.blog = Blog.objects.create(author=self.user, content='Drip irrigation tips')
+
+    def test_like_toggle_and_comment_update_counters(self):
+        liked = self.client.post(f'/api/blogs/{self.blog.id}/like/', **self.auth).json()
+        self.assertEqual((liked['likes_count'], liked['is_liked']), (1, True))
+        unliked = self.client.post(f'/api/blogs/{self.blog.id}/like/', **self.auth).json()
+        self.assertEqual((unliked['likes_count'], unliked['is_liked']), (0, False))
+
+        self.client.post(f'/api/blogs/{self.blog.id}/comments/', {'content': 'Useful'}, **self.auth)
+        self.blog.refresh_from_db()
+        self.assertEqual((self.blog.like_count, self.blog.comment_count), (0, 1))
+
+    def test_toggles_that_lose_a_race_leave_the_counter_alone(self):
+        Like = Blog.likes.through
+        get_or_create = Like.objects.get_or_create
+
+        def concurrent_like(**kwargs):
+            # A double-click: the other request inserts the like and bumps the
+            # counter between this request's delete and its insert
+            Like.objects.create(**kwargs)
+            Blog.objects.filter(id=self.blog.id).update(like_count=F('like_count') + 1)
+            return get_or_create(**kwargs)
+
+        with mock.patch.object(Like.objects, 'get_or_create', side_effect=concurrent_like):
+            liked = self.client.post(f'/api/blogs/{self.blog.id}/like/', **self.auth).json()
+        self.assertEqual((liked['likes_count'], liked['is_liked']), (1, True))
+        self.assertEqual(Like.objects.filter(blog=self.blog).count(), 1)
+
+    def test_repair_command_fixes_drift(self):
+        self.blog.likes.add(self.user)
+        Blog.objects.filter(id=self.blog.id).update(like_count=7, comment_count=3)
+        call_command('repair_blog_counters', stdout=StringIO())
+        self.blog.refresh_from_db()
+        self.assertEqual((self.blog.like_count, self.blog.comment_count), (1, 0))
+
+
+class PollResultsTests(TestCase):
+    def setUp(self):
+        self.user, self.auth = authenticated_user(phone='9000000004', name='Kiran')
+        self.poll = Poll.objects.create(question='Best kharif crop?', created_by=self.user)
+        self.rice = Choice.objects.create(poll=self.poll, choice_text='Rice')
+        self.other_poll = Poll.objects.create(question='Other?', created_by=self.user)
+        Choice.objects.create(poll=self.poll, choice_text='Cotton')
+
+    def test_vote_updates_tally_and_has_voted(self):
+        response = self.client.post('/api/polls/vote/', {'poll': self.poll.id, 'choice': self.rice.id}, **self.auth)
+        self.assertEqual(response.status_code, 201)
+        again = self.client.post('/api/polls/vote/', {'poll': self.poll.id, 'choice': self.rice.id}, **self.auth)
+        self.assertEqual(again.status_code, 400)
+
+        results = self.client.get(f'/api/polls/{self.poll.id}/results/', **self.auth).json()
+        self.assertTrue(results['has_voted'])
+        self.assertEqual(results['total_votes'], 1)
+        self.assertEqual(
+            [(c['choice_text'], c['vote_count'], c['percentage']) for c in results['choices']],
+            [('Rice', 1, 100.0), ('Cotton', 0, 0.0)],
+        )
+
+    def test_choice_must_belong_to_poll(self):
+        response = self.client.post('/api/polls/vote/', {'poll': self.other_poll.id, 'choice': self.rice.id}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+
+class AdminStatsTests(TestCase):
+    def setUp(self):
+        self.admin, self.auth = authenticated_user(phone='9000000005', name='Admin', role='administrator')
+
+    def test_counters_follow_writes_and_match_recompute(self):
+        farmer = User.objects.create_user(phone='9000000006', name='Farmer', role='farmer')
+        blog = Blog.objects.create(author=farmer, content='Soil test results')
+        blog.comments.create(author=self.admin, content='Thanks')
+        farmer.role = 'retailer'
+        farmer.save()
+
+        warm_token_cache(self.client, self.auth)
+        with self.assertNumQueries(2):
+            live = self.client.get('/api/admin/stats/', {'days': 7}, **self.auth).json()
+        self.assertEqual(
+            (live['totalUsers'], live['totalBlogs'], live['totalComments']), (2, 1, 1)
+        )
+        self.assertEqual(live['usersByRole'], {'administrator': 1, 'retailer': 1})
+        self.assertEqual(live['growth']['users'][-1]['count'], 2)
+        self.assertEqual(len(live['growth']['blogs']), 7)
+
+        recomputed = self.client.post('/api/admin/stats/', **self.auth).json()
+        live.pop('growth')
+        self.assertEqual(recomputed, live)
+
+
+class AdminUserListTests(TestCase):
+    def setUp(self):
+        self.admin, self.auth = authenticated_user(phone='9000000007', name='Admin', role='administrator')
+        for i, (name, state) in enumerate([('Sunita', 'Gujarat'), ('suresh', 'Gujarat'), ('Amar', 'Punjab')]):
+            User.objects.create_user(phone=f'98000000{i:02d}', name=name, role='farmer', state=state)
+
+    def test_filters_search_and_pagination(self):
+        page = self.client.get('/api/admin/users/', {'role': 'farmer', 'page_size': 2}, **self.auth).json()
+        self.assertEqual([u['name'] for u in page['results']], ['Amar', 'suresh'])
+        rest = self.client.get(page['next'], **self.auth).json()
+        self.assertEqual([u['name'] for u in rest['results']], ['Sunita'])
+
+        found = self.client.get('/api/admin/users/', {'q': 'su', 'state': 'Gujarat'}, **self.auth).json()
+        self.assertEqual({u['name'] for u in found['results']}, {'Sunita', 'suresh'})
+        by_phone = self.client.get('/api/admin/users/', {'q': '9800000002'}, **self.auth).json()
+        self.assertEqual([u['name'] for u in by_phone['results']], ['Amar'])
+
+    def test_rejects_bad_dates(self):
+        response = self.client.get('/api/admin/users/', {'joined_after': 'yesterday'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+        ok = self.client.get('/api/admin/users/', {'joined_after': '2020-01-01'}, **self.auth)
+        self.assertEqual(len(ok.json()['results']), 4)
+
+
+class ProfileProjectionTests(TestCase):
+    def setUp(self):
+        self.farmer, self.auth = authenticated_user(phone='9000000008', name='Lakshmi', role='farmer', main_crops='Cotton')
+
+    def test_farmer_gets_farmer_fields_only(self):
+        data = self.client.get('/api/profile/', **self.auth).json()
+        self.assertEqual(data['main_crops'], 'Cotton')
+        self.assertEqual(data['email'], '')
+        self.assertNotIn('business_name', data)
+        self.assertNotIn('department_name', data)
+
+    def test_sparse_fieldsets(self):
+        data = self.client.get('/api/profile/', {'fields': 'name,phone,business_name'}, **self.auth).json()
+        self.assertEqual(data, {'phone': '9000000008', 'name': 'Lakshmi'})
+        data = self.client.get('/api/profile/', {'omit': 'main_crops,email'}, **self.auth).json()
+        self.assertNotIn('main_crops', data)
+        self.assertIn('farm_size', data)
+
+    def test_admin_detail_prunes_columns(self):
+        _, auth = authenticated_user(phone='9000000009', name='Admin', role='administrator')
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(f'/api/admin/users/{self.farmer.id}/', {'fields': 'name'}, **auth).json()
+        self.assertEqual(data, {'name': 'Lakshmi'})
+        self.assertNotIn('main_crops', queries.captured_queries[-1]['sql'])
+
+    def test_profile_prunes_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get('/api/profile/', {'fields': 'name,phone'}, **self.auth).json()
+        self.assertEqual(data, {'phone': '9000000008', 'name': 'Lakshmi'})
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn('"farmers_user"."name"', sql)
+        self.assertNotIn('main_crops', sql)
+
+
+class BlogSearchTests(TestCase):
+    def setUp(self):
+        self.user, self.auth = authenticated_user(phone='9000000010', name='Gopal')
+        self.wheat = Blog.objects.create(author=self.user, content='Wheat rust: spray early, wheat yields recover', tags='Wheat, #Disease')
+        self.rice = Blog.objects.create(author=self.user, content='Transplanting rice after early monsoon, then wheat', tags='rice')
+        Blog.objects.create(author=self.user, content='Market trends for onion', tags='market')
+
+    def search(self, **params):
+        return self.client.get('/api/blogs/search/', params, **self.auth).json()
+
+    def test_ranked_prefix_search_and_tag_filter(self):
+        self.assertEqual([b['id'] for b in self.search(q='wheat')['results']], [self.wheat.id, self.rice.id])
+        self.assertEqual({b['id'] for b in self.search(q='earl')['results']}, {self.wheat.id, self.rice.id})
+        self.assertEqual([b['id'] for b in self.search(q='early', tag='disease')['results']], [self.wheat.id])
+        self.assertEqual([b['id'] for b in self.search(tag='rice')['results']], [self.rice.id])
+        self.assertEqual(self.search(q='" *')['results'], [])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.rice.content = 'Direct seeded paddy'
+        self.rice.tags = 'paddy'
+        self.rice.save()
+        self.wheat.delete()
+        self.assertEqual(self.search(q='early')['results'], [])
+        self.assertEqual([b['id'] for b in self.search(q='paddy')['results']], [self.rice.id])
+
+        tags = self.client.get('/api/blogs/tags/', **self.auth).json()
+        self.assertEqual(tags, [{'name': 'market', 'count': 1}, {'name': 'paddy', 'count': 1}])
+
+
+class SchemeEligibilityTests(TestCase):
+    def setUp(self):
+        scheme_index.invalidate()
+        self.farmer, self.auth = authenticated_user(
+            phone='9000000011', name='Bhavesh', role='farmer',
+            state='Gujarat', main_crops='Cotton, Groundnut', farm_size='3 acres', type_of_farming='Organic',
+        )
+
+    def scheme(self, name, **criteria):
+        return GovernmentScheme.objects.create(
+            name=name, benefit='-', eligibility='-', docs='-', apply_url='https://example.gov.in', criteria=criteria,
+        )
+
+    def eligible(self):
+        return [s['name'] for s in self.client.get('/api/schemes/eligible/', **self.auth).json()]
+
+    def test_matches_structured_criteria(self):
+        self.scheme('PM-KISAN')
+        self.scheme('Gujarat cotton', states=['gujarat'], crops=['cotton'])
+        self.scheme('Punjab wheat', states=['Punjab'], crops=['wheat'])
+        self.scheme('Smallholders', max_farm_size=2)
+        self.scheme('Organic mission', farming_types=['organic'], min_farm_size=1)
+        self.assertEqual(self.eligible(), ['PM-KISAN', 'Gujarat cotton', 'Organic mission'])
+
+    def test_index_is_invalidated_by_edits(self):
+        scheme = self.scheme('Punjab only', states=['Punjab'])
+        self.assertEqual(self.eligible(), [])
+        response = self.client.patch(
+            f'/api/schemes/{scheme.id}/', {'criteria': {'states': ['Gujarat']}}, content_type='application/json', **self.auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.eligible(), ['Punjab only'])
+
+    def test_blank_profile_does_not_shrink_the_index(self):
+        ids = [
+            self.scheme('Any').id,
+            self.scheme('Smallholders', max_farm_size=2).id,
+            self.scheme('Wheat', crops=['wheat']).id,
+        ]
+        index = SchemeEligibilityIndex(GovernmentScheme.objects.order_by('id'), lambda scheme: scheme.id)
+        self.assertEqual(index.match(farm_size=10), [ids[0], ids[2]])
+        self.assertEqual(index.match(farm_size=10), [ids[0], ids[2]])
+        self.assertEqual(index.match(crops=['Wheat'], farm_size=1), ids)
+
+    def test_rejects_malformed_criteria(self):
+        scheme = self.scheme('Any')
+        response = self.client.patch(
+            f'/api/schemes/{scheme.id}/', {'criteria': {'states': 'Gujarat'}}, content_type='application/json', **self.auth
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class BlogPdfCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(BLOG_PDF_CACHE_DIR=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.admin, self.auth = authenticated_user(phone='9000000012', name='Admin', role='administrator')
+        self.blog = Blog.objects.create(author=self.admin, content='Drip irrigation basics', tags='water')
+
+    def test_renders_in_background_then_serves_conditionally(self):
+        url = f'/api/blogs/{self.blog.id}/download-pdf/'
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Retry-After'], '2')
+
+        blog_pdf_cache.submit(self.blog).result(timeout=30)
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **self.auth)
+        self.assertEqual(response.status_code, 304)
+
+        self.blog.content = 'Drip irrigation, revised'
+        self.blog.save()
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 202)
+
+    def test_markup_in_content_renders(self):
+        self.blog.content = 'use <b>neem oil & ash'
+        self.blog.save()
+        path = blog_pdf_cache.submit(self.blog).result(timeout=30)
+        self.assertTrue(os.path.exists(path))
+
+    def test_failed_render_is_reported_not_retried(self):
+        url = f'/api/blogs/{self.blog.id}/download-pdf/'
+        with mock.patch('farmers.utils.pdf_cache.generate_blog_pdf', side_effect=ValueError('bad markup')) as render, \
+                self.assertLogs('farmers.utils.pdf_cache', 'ERROR'):
+            with self.assertRaises(PdfRenderError):
+                blog_pdf_cache.submit(self.blog).result(timeout=30)
+            for _ in range(2):
+                self.assertEqual(self.client.get(url, **self.auth).status_code, 500)
+        self.assertEqual(render.call_count, 1)
+
+        self.blog.content = 'Fixed'
+        self.blog.save()
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 202)
+
+    def test_late_render_of_an_old_version_keeps_the_new_file(self):
+        old = Blog.objects.get(id=self.blog.id)
+        self.blog.content = 'Drip irrigation, revised'
+        self.blog.save()
+        new_path = blog_pdf_cache.submit(self.blog).result(timeout=30)
+        old_path = blog_pdf_cache.submit(old).result(timeout=30)
+        self.assertTrue(os.path.exists(new_path))
+
+        self.blog.save()
+        blog_pdf_cache.submit(self.blog).result(timeout=30)
+        self.assertFalse(os.path.exists(new_path) or os.path.exists(old_path))
+
+    def test_admin_export_streams_zip(self):
+        other = Blog.objects.create(author=self.admin, content='Mulching')
+        response = self.client.get(
+            '/api/admin/blogs/export-pdf/', {'ids': f'{self.blog.id},{other.id}'}, **self.auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [f'blog_{self.blog.id}.pdf', f'blog_{other.id}.pdf'])
+        self.assertTrue(archive.read(f'blog_{other.id}.pdf').startswith(b'%PDF'))
+
+    def test_admin_export_notes_failed_renders(self):
+        other = Blog.objects.create(author=self.admin, content='Mulching')
+        render = mock.patch('farmers.utils.pdf_cache.generate_blog_pdf', side_effect=ValueError('bad markup'))
+        with render, self.assertLogs('farmers.utils.pdf_cache', 'ERROR'):
+            blog_pdf_cache.submit(self.blog).exception(timeout=30)
+        blog_pdf_cache.submit(other).result(timeout=30)
+        with self.assertLogs('farmers.utils.pdf_cache', 'WARNING'):
+            response = self.client.get(
+                '/api/admin/blogs/export-pdf/', {'ids': f'{self.blog.id},{other.id}'}, **self.auth
+            )
+            archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [f'blog_{self.blog.id}.error.txt', f'blog_{other.id}.pdf'])
+        self.assertIn(b'bad markup', archive.read(f'blog_{self.blog.id}.error.txt'))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user, self.auth = authenticated_user(phone='9000000013', name='Kiran', role='farmer')
+        self.other, self.other_auth = authenticated_user(phone='9000000014', name='Meena', role='farmer')
+
+    def revalidate(self, url, etag, auth):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag, **auth)
+
+    def test_scheme_list_and_detail(self):
+        scheme = GovernmentScheme.objects.create(
+            name='PM-KISAN', benefit='-', eligibility='-', docs='-', apply_url='https://example.gov.in',
+        )
+        for url in ('/api/schemes/', f'/api/schemes/{scheme.id}/'):
+            etag = self.client.get(url, **self.auth)['ETag']
+            with self.assertNumQueries(1):
+                self.assertEqual(self.revalidate(url, etag, self.auth).status_code, 304)
+            scheme.benefit = 'Rs 6000 a year'
+            scheme.save()
+            self.assertEqual(self.revalidate(url, etag, self.auth).status_code, 200)
+
+    def test_blog_detail_is_per_user_and_tracks_counters(self):
+        blog = Blog.objects.create(author=self.other, content='Seed drill rental')
+        url = f'/api/blogs/{blog.id}/'
+        response = self.client.get(url, **self.auth)
+        etag = response['ETag']
+        self.assertIn('Authorization', response['Vary'])
+        self.assertNotEqual(self.client.get(url, **self.other_auth)['ETag'], etag)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, etag, self.auth).status_code, 304)
+        self.client.post(f'/api/blogs/{blog.id}/like/', **self.other_auth)
+        self.assertEqual(self.revalidate(url, etag, self.auth).status_code, 200)
+
+    def test_profile(self):
+        url = '/api/profile/'
+        etag = self.client.get(url, **self.auth)['ETag']
+        self.assertEqual(self.revalidate(url, etag, self.auth).status_code, 304)
+        self.client.put(url, {'village': 'Anand'}, content_type='application/json', **self.auth)
+        self.assertEqual(self.revalidate(url, etag, self.auth).status_code, 200)
+
+    def test_profile_sees_edits_made_by_other_processes(self):
+        url = '/api/profile/'
+        etag = self.client.get(url, **self.auth)['ETag']
+        # A save in another worker: this process's token cache is not told
+        User.objects.filter(pk=self.user.pk).update(village='Anand', updated_at=timezone.now())
+        response = self.revalidate(url, etag, self.auth)
+        self.assertEqual((response.status_code, response.json()['village']), (200, 'Anand'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        self.user = User.objects.create_user(phone='9000000015', name='Farida', password='x', role='farmer')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+
+    def test_repeat_requests_skip_the_token_query(self):
+        # The token lookup, then the profile row the view reads itself
+        with self.assertNumQueries(2):
+            self.client.get('/api/profile/', **self.auth)
+        with self.assertNumQueries(1):
+            self.client.get('/api/profile/', **self.auth)
+        token, user = token_user_cache.get(self.token.key)
+        self.assertIsNot(user, token_user_cache.get(self.token.key)[1])
+
+    def test_logout_and_user_changes_invalidate(self):
+        self.client.get('/api/profile/', **self.auth)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/profile/', **self.auth).status_code, 401)
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.post('/api/logout/', **self.auth).status_code, 200)
+        self.assertIsNone(token_user_cache.get(self.token.key))
+        self.assertEqual(self.client.get('/api/profile/', **self.auth).status_code, 401)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportFarmersTests(TestCase):
+    def write_csv(self, rows):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = f'{tmp.name}/farmers.csv'
+        with open(path, 'w') as f:
+            f.write('phone,name,state,district,village,crops,language,password\n')
+            f.writelines(f'{row}\n' for row in rows)
+        return path
+
+    def test_imports_validates_and_dedupes(self):
+        User.objects.create_user(phone='9100000003', name='Existing', role='farmer')
+        path = self.write_csv([
+            '9100000001,Asha,Gujarat,Anand,Vasad,"Cotton, Wheat",Gujarati,secret1',
+            '91000 00002,Bala,Punjab,Ludhiana,Raikot,Wheat,Punjabi,',
+            '9100000001,Asha again,Gujarat,Anand,Vasad,Cotton,Gujarati,',
+            '9100000003,Existing,Gujarat,,,,,',
+            'not-a-phone,Nobody,,,,,,',
+        ])
+        call_command('import_farmers', path, '--workers', '1', '--batch-size', '2', stdout=StringIO(), stderr=StringIO())
+
+        asha = User.objects.get(phone='9100000001')
+        self.assertEqual((asha.main_crops, asha.preferred_language, asha.role), ('Cotton, Wheat', 'Gujarati', 'farmer'))
+        self.assertTrue(asha.check_password('secret1'))
+        self.assertFalse(User.objects.get(phone='9100000002').has_usable_password())
+        self.assertEqual(Token.objects.filter(user__phone__startswith='910000000').count(), 2)
+        self.assertEqual(dashboard_stats()['totalUsers'], User.objects.count())
+
+    def test_resumes_from_checkpoint(self):
+        path = self.write_csv(['9200000001,One,,,,,,', '9200000002,Two,,,,,,'])
+        with open(f'{path}.checkpoint', 'w') as f:
+            json.dump({'source': ImportFarmersCommand.source_signature(path), 'rows_done': 1}, f)
+        call_command('import_farmers', path, '--workers', '1', stdout=StringIO())
+        self.assertEqual(list(User.objects.values_list('name', flat=True)), ['Two'])
+
+
+class SchemeImportExportTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def import_json(self, schemes):
+        path = f'{self.dir}/schemes.json'
+        with open(path, 'w') as f:
+            json.dump(schemes, f)
+        call_command('import_schemes', path, stdout=StringIO(), stderr=StringIO())
+
+    def test_upserts_on_external_id_and_round_trips(self):
+        base = {'benefit': '-', 'eligibility': '-', 'docs': '-', 'apply_url': 'https://example.gov.in'}
+        self.import_json([
+            {'external_id': 'pm-kisan', 'name': 'PM-KISAN', **base},
+            {'external_id': 'kcc', 'name': 'Kisan Credit Card', **base, 'criteria': {'states': ['Gujarat']}},
+        ])
+        version = get_version('schemes')
+        with self.assertNumQueries(7):
+            # lookup, insert, update, scheme count, version; plus the savepoint pair
+            self.import_json([{'external_id': 'kcc', 'name': 'KCC'}, {'external_id': 'pmfby', 'name': 'PMFBY', **base}])
+        self.assertEqual(get_version('schemes'), version + 1)
+        self.assertEqual(GovernmentScheme.objects.get(external_id='kcc').criteria, {'states': ['Gujarat']})
+        self.assertEqual(dashboard_stats()['totalSchemes'], 3)
+
+        out = StringIO()
+        call_command('export_schemes', '--format', 'csv', stdout=out)
+        path = f'{self.dir}/schemes.csv'
+        with open(path, 'w') as f:
+            f.write(out.getvalue())
+        GovernmentScheme.objects.filter(external_id='kcc').update(name='Changed')
+        call_command('import_schemes', path, stdout=StringIO())
+        self.assertEqual(GovernmentScheme.objects.get(external_id='kcc').name, 'KCC')
+        self.assertEqual(GovernmentScheme.objects.count(), 3)
+
+    def test_schemes_created_later_round_trip(self):
+        base = {'benefit': '-', 'eligibility': '-', 'docs': '-', 'apply_url': 'https://example.gov.in'}
+        self.import_json([{'external_id': 'pm-kisan', 'name': 'PM-KISAN', **base}])
+        added = GovernmentScheme.objects.create(name='Soil Health Card', **base)
+        blank = GovernmentScheme.objects.create(external_id='', name='PMKSY', **base)
+        self.assertEqual(
+            (added.external_id, blank.external_id), (f'scheme-{added.id}', f'scheme-{blank.id}')
+        )
+
+        out = StringIO()
+        call_command('export_schemes', stdout=out)
+        GovernmentScheme.objects.filter(id=added.id).update(name='Changed')
+        self.import_json(json.loads(out.getvalue()))
+        self.assertEqual(GovernmentScheme.objects.get(id=added.id).name, 'Soil Health Card')
+        self.assertEqual(GovernmentScheme.objects.count(), 3)
+
+    def test_invalid_rows_abort_the_import(self):
+        with self.assertRaises(CommandError):
+            self.import_json([
+                {'external_id': 'ok', 'name': 'Ok', 'benefit': '-', 'eligibility': '-', 'docs': '-', 'apply_url': 'https://x.in'},
+                {'external_id': 'bad', 'name': 'Bad', 'criteria': {'states': 'Gujarat'}},
+            ])
+        self.assertFalse(GovernmentScheme.objects.exists())
+
+
+class DatabaseLayerTests(TestCase):
+    def test_sqlite_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64000)
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    def test_read_only_requests_are_routed_to_replicas(self):
+        router = ReadReplicaRouter()
+        seen = {}
+
+        def view(request):
+            seen[request.method] = (router.db_for_read(User), router.db_for_write(User))
+            return HttpResponse()
+
+        middleware = ReadReplicaMiddleware(view)
+        factory = RequestFactory()
+        middleware(factory.get('/api/blogs/'))
+        self.assertEqual(seen['GET'], ('replica_1', 'default'))
+        middleware(factory.post('/api/blogs/'))
+        self.assertEqual(seen['POST'], ('default', 'default'))
+        middleware(factory.get('/api/admin/users/'))
+        self.assertEqual(seen['GET'], ('default', 'default'))
+        self.assertEqual(router.db_for_read(User), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    async def test_replica_middleware_runs_async(self):
+        router = ReadReplicaRouter()
+        seen = []
+
+        async def view(request):
+            seen.append(router.db_for_read(User))
+            return HttpResponse()
+
+        middleware = ReadReplicaMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        await middleware(AsyncRequestFactory().get('/api/blogs/'))
+        await middleware(AsyncRequestFactory().post('/api/blogs/'))
+        self.assertEqual(seen, ['replica_1', 'default'])
+        self.assertEqual(router.db_for_read(User), 'default')
+
+
+class BenchmarkSeedTests(TestCase):
+    def test_seeded_data_is_consistent(self):
+        call_command('seed_benchmark', '--users', '40', '--blogs', '60', '--schemes', '5', stdout=StringIO())
+        self.assertEqual(User.objects.count(), 40)
+        self.assertFalse(Blog.objects.with_actual_counts().exclude(like_count=F('actual_like_count')).exists())
+        self.assertEqual(Token.objects.count(), 40)
+        self.assertEqual(dashboard_stats()['totalBlogs'], 60)
+        self.assertTrue(search_blog_ids(Blog.objects.first().content.split()[0]))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99)], [50, 95, 99])
+        self.assertEqual(percentile([7], 99), 7)
+
+
+class UpstreamStubTests(TestCase):
+    def setUp(self):
+        self.behaviour = StubBehaviour(seed=1)
+        server = make_server(behaviour=self.behaviour)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = 'http://%s:%s' % server.server_address[:2]
+        upstreams = {
+            name: {**config, 'base_url': url, 'retries': 0}
+            for name, config in settings.UPSTREAMS.items()
+        }
+        stub = override_settings(UPSTREAMS=upstreams)
+        stub.enable()
+        self.addCleanup(stub.disable)
+
+        _, self.auth = authenticated_user(phone='9000000001', name='Asha')
+        for cache in (weather_cache, market_price_store):
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+    def test_weather_and_market_prices_from_fixtures(self):
+        weather = self.client.get('/api/weather/', {'lat': '22.56', 'lon': '72.95'}, **self.auth)
+        self.assertEqual(weather.status_code, 200)
+        prices = self.client.get('/api/market-prices/', {'state': 'Gujarat'}, **self.auth)
+        self.assertEqual(prices.status_code, 200)
+        self.assertTrue(prices.json()['records'])
+        self.assertEqual(self.behaviour.counts['errors'], 0)
+
+    def test_injected_errors(self):
+        self.behaviour.error_rate = 1.0
+        prices = self.client.get('/api/market-prices/', **self.auth)
+        self.assertEqual(prices.status_code, 502)
+        self.assertEqual(self.behaviour.counts['errors'], 1)
+
+    def test_latency_spec(self):
+        self.assertEqual(parse_latency('fixed:250')(None), 0.25)
+        with self.assertRaises(ValueError):
+            parse_latency('uniform:10')
+
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        self.user, self.auth = authenticated_user(phone='9000000003', name='Meera')
+        author = User.objects.create_user(phone='9100000001', name='Author')
+        Blog.objects.bulk_create([Blog(author=author, content=f'Post {i}') for i in range(3)])
+
+    def test_server_timing_header(self):
+        warm_token_cache(self.client, self.auth)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/blogs/', **self.auth)
+        header = response['Server-Timing']
+        self.assertIn('db;dur=', header)
+        self.assertIn(f'desc="{len(queries)} queries"', header)
+        self.assertIn('serializer;dur=', header)
+        self.assertIn('total;dur=', header)
+
+    def test_cross_origin_frontend_can_read_server_timing(self):
+        response = self.client.get('/api/blogs/', HTTP_ORIGIN='http://localhost:3000', **self.auth)
+        self.assertEqual(response['Access-Control-Allow-Origin'], '*')
+        self.assertIn('server-timing', response['Access-Control-Expose-Headers'].lower())
+        self.assertEqual(response['Timing-Allow-Origin'], '*')
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_request_log_has_query_digest(self):
+        with self.assertLogs('farmers.requests.slow', 'WARNING') as logs:
+            self.client.get('/api/blogs/', **self.auth)
+        self.assertIn('Slow request GET /api/blogs/', logs.output[0])
+        self.assertIn('FROM "farmers_blog"', logs.output[0])
+
+    async def test_async_requests_are_timed_on_the_event_loop(self):
+        async def view(request):
+            await User.objects.acount()
+            return HttpResponse()
+
+        middleware = RequestTimingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(AsyncRequestFactory().get('/api/weather/async/'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_nested_phases_counted_once(self):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with timed('serializer'):
+                with timed('serializer'):
+                    pass
+        finally:
+            _current.reset(token)
+        self.assertEqual(timings.phase_calls['serializer'], 2)
+        self.assertEqual(timings._depth['serializer'], 0)
+        self.assertEqual(
+            digest_sql('SELECT * FROM t WHERE id IN (%s, %s,  %s)'), 'SELECT * FROM t WHERE id IN (...)'
+        )
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        _, self.admin = authenticated_user(phone='9000000004', name='Admin', role='administrator')
+        _, self.farmer = authenticated_user(phone='9000000005', name='Farmer')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_admin_gets_text_report(self):
+        response = self.client.get('/api/schemes/', {'profile': 'text'}, **self.admin)
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertIn(b'cumulative', response.content)
+
+    def test_text_report_carries_cors_headers(self):
+        response = self.client.get(
+            '/api/schemes/', {'profile': 'text'}, HTTP_ORIGIN='http://localhost:3000', **self.admin
+        )
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(response['Access-Control-Allow-Origin'], '*')
+        preflight = self.client.options(
+            '/api/schemes/', HTTP_ORIGIN='http://localhost:3000',
+            HTTP_ACCESS_CONTROL_REQUEST_METHOD='GET', HTTP_ACCESS_CONTROL_REQUEST_HEADERS='x-profile',
+        )
+        self.assertIn('x-profile', preflight['Access-Control-Allow-Headers'])
+
+    async def test_profiles_sync_views_under_asgi(self):
+        response = await self.async_client.get(
+            '/api/schemes/', {'profile': 'text'}, AUTHORIZATION=self.admin['HTTP_AUTHORIZATION'],
+        )
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertIn(b'(list)', response.content)
+
+    def test_non_admin_flag_is_ignored(self):
+        response = self.client.get('/api/schemes/', HTTP_X_PROFILE='text', **self.farmer)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile', response)
+        self.assertIsInstance(response.json(), list)
+
+    def test_stored_and_sampled_profiles(self):
+        with override_settings(PROFILE_DIR=self.directory), self.assertLogs('farmers.profiling'):
+            response = self.client.get('/api/schemes/', HTTP_X_PROFILE='1', **self.admin)
+        self.assertEqual(os.listdir(self.directory), [response['X-Profile']])
+        with override_settings(PROFILE_DIR=self.directory, PROFILE_SAMPLE_RATE=1.0, PROFILE_MAX_FILES=1), \
+                self.assertLogs('farmers.profiling'):
+            response = self.client_class().get('/api/schemes/', **self.farmer)
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        _, self.auth = authenticated_user(phone='9000000006', name='Kiran')
+        token_user_cache.clear()
+        self.addCleanup(token_user_cache.clear)
+
+    def test_route_latency_queries_and_cache_ratio(self):
+        for _ in range(3):
+            self.client.get('/api/schemes/', **self.auth)
+        self.client.get('/api/blogs/999999/', **self.auth)
+        with override_settings(METRICS_PUBLIC=True):
+            response = self.client.get('/api/metrics/')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        text = response.content.decode()
+        self.assertRegex(
+            text, r'agrisaarthi_http_request_duration_seconds_count\{route="api/schemes/",method="GET"\} [1-9]'
+        )
+        self.assertIn('agrisaarthi_http_request_db_queries_bucket{route="api/schemes/",method="GET",le="+Inf"}', text)
+        self.assertIn('agrisaarthi_http_requests_total{route="api/blogs/<int:pk>/",method="GET",status="404"}', text)
+        self.assertIn('agrisaarthi_cache_hit_ratio{cache="auth_token"} 0.75', text)
+        self.assertIn('agrisaarthi_http_requests_in_flight 1', text)
+
+    def test_metrics_require_a_token_by_default(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+        self.assertEqual(self.client.get('/api/metrics/', **self.auth).status_code, 401)
+        _, admin = authenticated_user(phone='9000000016', name='Admin', role='administrator')
+        self.assertEqual(self.client.get('/api/metrics/', **admin).status_code, 200)
+
+    @override_settings(METRICS_AUTH_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_finished_threads_fold_into_the_base_total(self):
+        local_registry = Registry()
+        counter = local_registry.metric('test_total', 'Test counter.', 'counter', ('route',))
+        for _ in range(20):
+            thread = threading.Thread(target=counter.inc, args=('blogs/',))
+            thread.start()
+            thread.join()
+        gc.collect()
+        self.assertEqual(len(local_registry._shards), 0)
+        self.assertEqual(local_registry.samples(), {('test_total', ('blogs/',)): 20})
+
+    def test_snapshots_from_other_processes_are_merged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        before = registry.samples().get((REQUESTS.name, ('health/', 'GET', '200')), 0)
+        # A worker that has exited: its counters still count, its gauges do not
+        with open(os.path.join(directory, '999999999.json'), 'w') as f:
+            json.dump([
+                [REQUESTS.name, ['health/', 'GET', '200'], 5],
+                [REQUESTS_IN_FLIGHT.name, [], 7],
+            ], f)
+        with open(os.path.join(directory, 'dashboards.json'), 'w') as f:
+            f.write('{}')
+        with override_settings(METRICS_DIR=directory):
+            totals = registry.collect()
+        self.assertEqual(totals[(REQUESTS.name, ('health/', 'GET', '200'))], before + 5)
+        self.assertEqual(totals.get((REQUESTS_IN_FLIGHT.name, ()), 0), 0)
+        self.assertIn(f'{os.getpid()}.json', os.listdir(directory))
@@ -0,0 +1,106 @@
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# The collector for the request being handled, set by RequestTimingMiddleware.
+# sync_to_async carries it into the ORM thread of async views; threads
+# started during a request (background refreshes, PDF renders) start with an
+# empty context and are not attributed to it.
+_current = ContextVar('request_timings', default=None)
+
+_IN_LIST = re.compile(r'\((?:%s|\?)(?:,\s*(?:%s|\?))+\)')
+_SPACE = re.compile(r'\s+')
+
+
+def digest_sql(sql):
+    """Normalise a statement so repeats with different ``IN (...)`` lengths group together."""
+    return _SPACE.sub(' ', _IN_LIST.sub('(...)', sql)).strip()
+
+
+class RequestTimings:
+    """
+    Per-request counters: SQL statements and time, plus wall time spent in
+    named phases (``upstream``, ``serializer``) entered through ``timed``.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements = {}
+        self.phase_time = defaultdict(float)
+        self.phase_calls = defaultdict(int)
+        self._depth = defaultdict(int)
+        self._entered = {}
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.sql_count += 1
+            self.sql_time += duration
+            entry = self.statements.setdefault(digest_sql(sql), [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+
+    def enter(self, phase):
+        self.phase_calls[phase] += 1
+        self._depth[phase] += 1
+        if self._depth[phase] == 1:
+            self._entered[phase] = time.perf_counter()
+
+    def exit(self, phase):
+        self._depth[phase] -= 1
+        if self._depth[phase] == 0:
+            self.phase_time[phase] += time.perf_counter() - self._entered.pop(phase)
+
+    def top_statements(self, limit=10):
+        """``(count, seconds, sql)`` for the most expensive statements, costliest first."""
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [(count, duration, sql) for sql, (count, duration) in ranked[:limit]]
+
+
+def record_sql(execute, sql, params, many, context):
+    """Execute wrapper on every connection; counts statements run for a timed request."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_sql_recorder(sender, connection, **kwargs):
+    # Connections live per thread, so a per-request execute_wrapper() would
+    # miss queries async views run through sync_to_async
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Attribute the enclosed block to ``phase`` of the current request.
+
+    Nested or overlapping blocks of the same phase are counted once; outside
+    a timed request this is a no-op.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    timings.enter(phase)
+    try:
+        yield
+    finally:
+        timings.exit(phase)
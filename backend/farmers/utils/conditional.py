@@ -0,0 +1,31 @@
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+def set_validators(response, etag=None, last_modified=None, vary=()):
+    """
+    Attach ``ETag``/``Last-Modified`` headers and ask clients to revalidate.
+    ``vary`` names request headers the validators depend on, e.g.
+    ``Authorization`` for per-user payloads.
+    """
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    if vary:
+        patch_vary_headers(response, vary)
+    return response
+
+
+def not_modified(request, etag=None, last_modified=None, vary=()):
+    """
+    A 304 response when the client's ``If-None-Match``/``If-Modified-Since``
+    validators still match, otherwise None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if isinstance(response, HttpResponseNotModified):
+        return set_validators(response, etag, last_modified, vary)
+    return None
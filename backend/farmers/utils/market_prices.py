@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from django.conf import settings
+
+from .upstream import get_client
+
+MARKET_PRICE_RESOURCE = "resource/35985678-0d79-46b4-9ed6-6f13308a1d24"
+
+
+MARKET_PRICE_PARAMS = {
+    "format": "json",
+    "limit": 1000,
+}
+
+
+def fetch_market_records():
+    response = get_client('data_gov').get_json(MARKET_PRICE_RESOURCE, params=MARKET_PRICE_PARAMS)
+    response.raise_for_status()
+    return response.data.get("records", [])
+
+
+async def afetch_market_records():
+    response = await get_client('data_gov').aget_json(MARKET_PRICE_RESOURCE, params=MARKET_PRICE_PARAMS)
+    response.raise_for_status()
+    return response.data.get("records", [])
+
+
+class MarketPriceSnapshot:
+    """
+    In-memory copy of the data.gov.in market price dataset.
+
+    Records are indexed by (state, district), by state and by district, plus
+    a commodity index keyed on the lowercased commodity name. Commodity
+    filtering keeps the old "substring of the commodity name" semantics, but
+    only scans the few hundred distinct commodity names instead of every
+    record.
+    """
+
+    def __init__(self, records, fetched_at=None):
+        self.records = records
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+        by_state_district = defaultdict(list)
+        by_state = defaultdict(list)
+        by_district = defaultdict(list)
+        by_commodity = defaultdict(list)
+        for position, rec in enumerate(records):
+            state = rec.get('State', '').lower()
+            district = rec.get('District', '').lower()
+            by_state_district[(state, district)].append(position)
+            by_state[state].append(position)
+            by_district[district].append(position)
+            by_commodity[rec.get('Commodity', '').lower()].append(position)
+
+        self._by_state_district = dict(by_state_district)
+        self._by_state = dict(by_state)
+        self._by_district = dict(by_district)
+        self._by_commodity = dict(by_commodity)
+        self._commodity_names = sorted(self._by_commodity)
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def _commodity_positions(self, commodity):
+        positions = set()
+        for name in self._commodity_names:
+            if commodity in name:
+                positions.update(self._by_commodity[name])
+        return positions
+
+    def filter(self, state='', district='', commodity=''):
+        state = state.lower()
+        district = district.lower()
+        commodity = commodity.lower()
+
+        if state and district:
+            positions = self._by_state_district.get((state, district), [])
+        elif state:
+            positions = self._by_state.get(state, [])
+        elif district:
+            positions = self._by_district.get(district, [])
+        else:
+            positions = range(len(self.records))
+
+        if commodity:
+            matching = self._commodity_positions(commodity)
+            positions = [p for p in positions if p in matching]
+
+        return [self.records[p] for p in positions]
+
+
+class MarketPriceStore:
+    """
+    Holds the current snapshot and refreshes it periodically.
+
+    The first request loads the dataset synchronously. After that, a snapshot
+    older than ``MARKET_PRICE_REFRESH_SECONDS`` is still served while a single
+    background thread fetches the replacement.
+    """
+
+    def __init__(self, fetch=fetch_market_records, afetch=afetch_market_records):
+        self._fetch = fetch
+        self._afetch = afetch
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def refresh_interval(self):
+        return getattr(settings, 'MARKET_PRICE_REFRESH_SECONDS', 15 * 60)
+
+    def refresh(self):
+        snapshot = MarketPriceSnapshot(self._fetch())
+        self._snapshot = snapshot
+        return snapshot
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            # Keep serving the previous snapshot; the next request retries.
+            pass
+        finally:
+            self._refreshing = False
+
+    def _start_background_refresh(self, snapshot):
+        if snapshot.age < self.refresh_interval:
+            return
+        with self._lock:
+            start = not self._refreshing
+            self._refreshing = True
+        if start:
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def get_snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    return self.refresh()
+                return self._snapshot
+
+        self._start_background_refresh(snapshot)
+        return snapshot
+
+    async def aget_snapshot(self):
+        """
+        Coroutine version of ``get_snapshot``.
+
+        Only the initial load is awaited on the event loop (concurrent first
+        requests share one fetch through the upstream client); later
+        refreshes reuse the background thread.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = MarketPriceSnapshot(await self._afetch())
+            if self._snapshot is None:
+                self._snapshot = snapshot
+            return self._snapshot
+
+        self._start_background_refresh(snapshot)
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+
+market_price_store = MarketPriceStore()
+
+
+def _filtered_payload(snapshot, query_params):
+    return {
+        "records": snapshot.filter(
+            state=query_params.get('state', ''),
+            district=query_params.get('district', ''),
+            commodity=query_params.get('commodity', ''),
+        ),
+        "snapshot_age_seconds": round(snapshot.age, 1),
+    }
+
+
+def _error_payload(e):
+    if isinstance(e, requests.RequestException):
+        return {"error": "Failed to fetch data from external API.", "details": str(e)}, 502
+    return {"error": "An unexpected error occurred.", "details": str(e)}, 500
+
+
+def market_price_payload(query_params):
+    """Return ``(payload, status)`` for the market price views."""
+    try:
+        return _filtered_payload(market_price_store.get_snapshot(), query_params), 200
+    except Exception as e:
+        return _error_payload(e)
+
+
+async def amarket_price_payload(query_params):
+    """Coroutine version of ``market_price_payload``."""
+    try:
+        return _filtered_payload(await market_price_store.aget_snapshot(), query_params), 200
+    except Exception as e:
+        return _error_payload(e)
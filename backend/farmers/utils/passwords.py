@@ -0,0 +1,9 @@
+from django.contrib.auth.hashers import make_password
+
+# Kept free of model imports so process-pool workers can unpickle
+# hash_password without setting up the app registry.
+
+
+def hash_password(password):
+    """Hash ``password``; an empty one gives an unusable password."""
+    return make_password(password or None)
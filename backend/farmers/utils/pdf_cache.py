@@ -0,0 +1,204 @@
+import io
+import logging
+import os
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+
+from .pdf_generator import generate_blog_pdf
+
+logger = logging.getLogger(__name__)
+
+
+class PdfRenderError(Exception):
+    """Rendering this version of a blog failed; it is not retried until the blog changes."""
+
+
+class BlogPdfCache:
+    """
+    Rendered blog PDFs on disk, one file per ``(blog.id, updated_at)``.
+
+    Files are written by a small worker pool so request threads never run
+    ReportLab; concurrent requests for the same version share one render.
+    Editing a blog bumps ``updated_at``, which gives the PDF a new name and
+    ETag; the superseded file is removed once the new one is in place.
+    A version that fails to render is remembered, so polling clients get
+    an error instead of queueing the same failing render again.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._pending = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        default = os.path.join(settings.MEDIA_ROOT, 'blog_pdfs')
+        return getattr(settings, 'BLOG_PDF_CACHE_DIR', default)
+
+    def _executor_instance(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BLOG_PDF_WORKERS', 2),
+                    thread_name_prefix='blog-pdf',
+                )
+            return self._executor
+
+    @staticmethod
+    def version(blog):
+        return int(blog.updated_at.timestamp() * 1_000_000)
+
+    def etag(self, blog):
+        return f'"blog-{blog.id}-{self.version(blog)}"'
+
+    def path(self, blog):
+        return os.path.join(self.directory, f"blog_{blog.id}_{self.version(blog)}.pdf")
+
+    def cached_path(self, blog):
+        path = self.path(blog)
+        return path if os.path.exists(path) else None
+
+    def submit(self, blog):
+        """Queue a render of this version of ``blog``; returns a Future of its path."""
+        key = (blog.id, self.version(blog))
+        executor = self._executor_instance()
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None and key in self._failures:
+                future = Future()
+                future.set_exception(PdfRenderError(self._failures[key]))
+            elif future is None:
+                future = executor.submit(self._render, blog, key)
+                self._pending[key] = future
+        return future
+
+    def get_or_schedule(self, blog):
+        """The cached file's path, or None after queueing a render; raises ``PdfRenderError`` if it failed."""
+        path = self.cached_path(blog)
+        if path is None:
+            future = self.submit(blog)
+            if future.done():
+                return future.result()
+        return path
+
+    def _render(self, blog, key):
+        try:
+            path = self.path(blog)
+            if not os.path.exists(path):
+                try:
+                    pdf_bytes = generate_blog_pdf(blog)
+                except Exception as e:
+                    logger.exception("Could not render the PDF of blog %s", blog.id)
+                    with self._lock:
+                        # Only the latest failing version of a blog is worth remembering
+                        for failed in [k for k in self._failures if k[0] == blog.id]:
+                            del self._failures[failed]
+                        self._failures[key] = str(e)
+                    raise PdfRenderError(str(e)) from e
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as tmp:
+                    tmp.write(pdf_bytes)
+                # Atomic, so readers never see a half-written file
+                os.replace(tmp_path, path)
+                # A slow render of an older version must not delete a newer file
+                self.discard(blog.id, older_than=key[1])
+            return path
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def discard(self, blog_id, older_than=None):
+        """Delete cached PDFs of ``blog_id``, or only those of versions before ``older_than``."""
+        prefix = f"blog_{blog_id}_"
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if not (entry.name.startswith(prefix) and entry.name.endswith('.pdf')):
+                continue
+            version = entry.name[len(prefix):-len('.pdf')]
+            if older_than is None or (version.isdigit() and int(version) < older_than):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+blog_pdf_cache = BlogPdfCache()
+
+
+class _ZipOutput(io.RawIOBase):
+    """Write-only, non-seekable sink that hands written bytes back in chunks."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_blog_pdf_zip(blogs, chunk_size=64 * 1024):
+    """
+    Yield a ZIP archive of the PDFs of ``blogs`` piece by piece.
+
+    The archive is written to a non-seekable stream, so zipfile emits data
+    descriptors and only the current chunk is ever held in memory. Renders
+    for uncached blogs are queued a few entries ahead of the writer so the
+    worker pool stays busy while earlier files are being streamed. A blog
+    whose PDF cannot be produced gets a ``blog_<id>.error.txt`` note in its
+    place, so one failure never truncates an archive already being sent.
+    """
+    output = _ZipOutput()
+    lookahead = getattr(settings, 'BLOG_PDF_WORKERS', 2) * 2
+    window = deque()
+    blogs = iter(blogs)
+
+    def fill():
+        while len(window) < lookahead:
+            blog = next(blogs, None)
+            if blog is None:
+                return
+            path = blog_pdf_cache.cached_path(blog)
+            window.append((blog, path or blog_pdf_cache.submit(blog)))
+
+    with zipfile.ZipFile(output, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        fill()
+        while window:
+            blog, source = window.popleft()
+            fill()
+            date_time = timezone.localtime(blog.updated_at).timetuple()[:6]
+            try:
+                path = source if isinstance(source, str) else source.result()
+                src = open(path, 'rb')
+            except (PdfRenderError, OSError) as e:
+                logger.warning("Left the PDF of blog %s out of an export: %s", blog.id, e)
+                note = zipfile.ZipInfo(f"blog_{blog.id}.error.txt", date_time=date_time)
+                archive.writestr(note, f"The PDF of blog {blog.id} could not be generated: {e}\n")
+                yield output.drain()
+                continue
+            info = zipfile.ZipInfo(f"blog_{blog.id}.pdf", date_time=date_time)
+            with src, archive.open(info, mode='w') as dst:
+                while chunk := src.read(chunk_size):
+                    dst.write(chunk)
+                    yield output.drain()
+            yield output.drain()
+    # Central directory
+    yield output.drain()
@@ -1,10 +1,13 @@
+import logging
 import os
 import io
+from xml.sax.saxutils import escape
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch
-from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
 
 def generate_blog_pdf(blog):
     buffer = io.BytesIO()  # Create in-memory buffer
@@ -20,13 +23,14 @@ def generate_blog_pdf(blog):
     # Author and Tags
     # story.append(Paragraph(f"<b>Author:</b> {blog.author.username}", styles['Normal']))
     story.append(Spacer(1, 6))
-    story.append(Paragraph(f"<b>Tags:</b> {blog.tags or 'N/A'}", styles['Normal']))
+    story.append(Paragraph(f"<b>Tags:</b> {escape(blog.tags or 'N/A')}", styles['Normal']))
     story.append(Spacer(1, 12))
 
     # Content
     story.append(Paragraph("<b>Content:</b>", styles['Heading2']))
     story.append(Spacer(1, 6))
-    story.append(Paragraph(blog.content, styles['Normal']))
+    # Paragraph parses markup; user text must not be able to break it
+    story.append(Paragraph(escape(blog.content), styles['Normal']))
     story.append(Spacer(1, 20))
 
     # Optional image
@@ -39,19 +43,14 @@ def generate_blog_pdf(blog):
                 img = Image(image_path, width=4*inch, height=3*inch)
                 story.append(img)
                 story.append(Spacer(1, 12))
-        except Exception as e:
+        except Exception:
             story.append(Paragraph("Error loading image.", styles['Normal']))
-            print("PDF image error:", e)
+            logger.warning("Could not embed the image of blog %s in its PDF", blog.id, exc_info=True)
 
     # Build PDF into memory
     doc.build(story)
 
     # Get PDF content from buffer
-    buffer.seek(0)
     pdf_bytes = buffer.getvalue()
     buffer.close()
-
-    # Return as HTTP response
-    response = HttpResponse(pdf_bytes, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="blog_{blog.id}.pdf"'
-    return response
+    return pdf_bytes
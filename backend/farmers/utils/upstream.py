@@ -0,0 +1,289 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from collections import namedtuple
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+from ..metrics import observe_upstream
+from ..timing import timed
+
+
+class UpstreamResponse(namedtuple('UpstreamResponse', ['url', 'status_code', 'data'])):
+    """Decoded upstream reply. ``data`` is shared between coalesced callers, so treat it as read-only."""
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} error from upstream for url: {self.url}")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Result handed to followers when the leading coroutine is cancelled
+_LEADER_CANCELLED = object()
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one execution.
+
+    The first caller for a key runs ``fn``; callers that arrive while it is
+    still running block until it finishes and receive the same result (or
+    the same exception). ``do`` is for threads, which covers WSGI workers and
+    sync views run by the ASGI handler's thread pool; ``ado`` is the
+    coroutine equivalent for callers on an event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, coro_fn):
+        loop = asyncio.get_running_loop()
+        # Futures belong to one event loop, so in-flight calls are tracked per loop
+        calls = self._async_calls.setdefault(loop, {})
+        future = calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            result = await asyncio.shield(future)
+            if result is _LEADER_CANCELLED:
+                # The leader's client went away; that is no reason to fail
+                # this request. The first follower to wake runs the call again.
+                return await self.ado(key, coro_fn)
+            return result
+
+        future = calls[key] = loop.create_future()
+        try:
+            result = await coro_fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Avoid "exception was never retrieved" warnings when nobody waited
+            future.exception()
+            raise
+        finally:
+            del calls[key]
+            if not calls:
+                self._async_calls.pop(loop, None)
+
+
+upstream_calls = SingleFlight()
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class UpstreamClient:
+    """
+    Pooled, keep-alive HTTP client for one upstream API.
+
+    Configuration comes from ``settings.UPSTREAMS[name]``:
+
+    * ``base_url``: scheme and host, e.g. a local stub server in tests
+    * ``api_key`` / ``api_key_param``: query parameter added to every call
+    * ``timeout``: seconds, or a ``(connect, read)`` tuple
+    * ``max_connections``: connection pool size for the host
+    * ``retries`` / ``backoff``: retry count and base delay in seconds
+    """
+
+    def __init__(self, name, base_url, api_key=None, api_key_param=None, timeout=10,
+                 max_connections=10, retries=2, backoff=0.5):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.api_key_param = api_key_param
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        # httpx.AsyncClient instances are bound to the event loop that created them
+        self._async_clients = weakref.WeakKeyDictionary()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_connections,
+            pool_block=True,
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _params(self, params):
+        params = dict(params or {})
+        if self.api_key and self.api_key_param:
+            params[self.api_key_param] = self.api_key
+        return params
+
+    def _sleep_before_retry(self, attempt):
+        # Full jitter: spread retries from many workers over the whole window
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def _fetch(self, url, params):
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                resp = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                kind = 'timeout' if isinstance(e, requests.Timeout) else 'connection'
+                observe_upstream(self.name, time.perf_counter() - started, kind)
+                if attempt >= self.retries:
+                    raise
+            else:
+                observe_upstream(self.name, time.perf_counter() - started, _error_kind(resp.status_code))
+                if resp.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    return UpstreamResponse(resp.url, resp.status_code, resp.json())
+            self._sleep_before_retry(attempt)
+            attempt += 1
+
+    def get_json(self, path, params=None):
+        """GET ``path`` and decode the JSON body, sharing one request between concurrent identical callers."""
+        url = self.url(path)
+        params = self._params(params)
+        with timed('upstream'):
+            return upstream_calls.do(_call_key(url, params), lambda: self._fetch(url, params))
+
+    def _async_client(self):
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            if isinstance(self.timeout, tuple):
+                connect, read = self.timeout
+                timeout = httpx.Timeout(read, connect=connect)
+            else:
+                timeout = httpx.Timeout(self.timeout)
+            client = self._async_clients[loop] = httpx.AsyncClient(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return client
+
+    async def _afetch(self, url, params):
+        import httpx
+
+        client = self._async_client()
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                resp = await client.get(url, params=params)
+            except httpx.TimeoutException as e:
+                observe_upstream(self.name, time.perf_counter() - started, 'timeout')
+                if attempt >= self.retries:
+                    # Raise the same exception types as the sync path so views handle both alike
+                    raise requests.Timeout(str(e)) from e
+            except httpx.TransportError as e:
+                observe_upstream(self.name, time.perf_counter() - started, 'connection')
+                if attempt >= self.retries:
+                    raise requests.ConnectionError(str(e)) from e
+            else:
+                observe_upstream(self.name, time.perf_counter() - started, _error_kind(resp.status_code))
+                if resp.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    try:
+                        data = resp.json()
+                    except ValueError as e:
+                        raise requests.RequestException(str(e)) from e
+                    return UpstreamResponse(str(resp.url), resp.status_code, data)
+            await asyncio.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+            attempt += 1
+
+    async def aget_json(self, path, params=None):
+        """Coroutine version of ``get_json`` built on httpx."""
+        url = self.url(path)
+        params = self._params(params)
+        with timed('upstream'):
+            return await upstream_calls.ado(_call_key(url, params), lambda: self._afetch(url, params))
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _error_kind(status_code):
+    if status_code >= 500:
+        return 'http_5xx'
+    if status_code >= 400:
+        return 'http_4xx'
+    return None
+
+
+def _call_key(url, params):
+    return url, tuple(sorted(params.items()))
+
+
+def get_client(name):
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                config = settings.UPSTREAMS[name]
+                client = _clients[name] = UpstreamClient(name, **config)
+    return client
+
+
+@receiver(setting_changed)
+def reset_clients(setting=None, **kwargs):
+    if setting not in (None, 'UPSTREAMS'):
+        return
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
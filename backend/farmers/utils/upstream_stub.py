@@ -0,0 +1,139 @@
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .market_prices import MARKET_PRICE_RESOURCE
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'fixtures', 'upstream')
+
+# path -> (fixture file, API key query parameter)
+ROUTES = {
+    '/data/2.5/weather': ('openweather_weather.json', 'appid'),
+    '/data/2.5/forecast': ('openweather_forecast.json', 'appid'),
+    f'/{MARKET_PRICE_RESOURCE}': ('data_gov_market_prices.json', 'api-key'),
+}
+
+
+def parse_latency(spec):
+    """
+    Turn a latency spec into a function returning a delay in seconds.
+
+    ``none``, ``fixed:MS``, ``uniform:MIN_MS,MAX_MS``, ``normal:MEAN_MS,STDDEV_MS``
+    or ``lognormal:MEDIAN_MS,SIGMA`` (a long right tail, like real APIs).
+    """
+    kind, _, args = (spec or 'none').partition(':')
+    try:
+        values = [float(v) for v in args.split(',')] if args else []
+        if kind == 'none':
+            return lambda rng: 0.0
+        if kind == 'fixed':
+            (ms,) = values
+            return lambda rng: ms / 1000
+        if kind == 'uniform':
+            low, high = values
+            return lambda rng: rng.uniform(low, high) / 1000
+        if kind == 'normal':
+            mean, stddev = values
+            return lambda rng: max(rng.gauss(mean, stddev), 0) / 1000
+        if kind == 'lognormal':
+            median, sigma = values
+            return lambda rng: rng.lognormvariate(0, sigma) * median / 1000
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency spec {spec!r}")
+
+
+class StubBehaviour:
+    """Latency, error and timeout injection shared by all handler threads."""
+
+    def __init__(self, latency='none', error_rate=0.0, error_status=503, timeout_rate=0.0,
+                 hang_seconds=30.0, seed=None):
+        self.delay = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {'requests': 0, 'errors': 0, 'timeouts': 0}
+
+    def draw(self):
+        """Decide the fate of one request: ``(delay_seconds, outcome)``."""
+        with self._lock:
+            self.counts['requests'] += 1
+            roll = self._rng.random()
+            delay = self.delay(self._rng)
+            if roll < self.timeout_rate:
+                self.counts['timeouts'] += 1
+                return self.hang_seconds, 'timeout'
+            if roll < self.timeout_rate + self.error_rate:
+                self.counts['errors'] += 1
+                return delay, 'error'
+            return delay, 'ok'
+
+
+def _load_fixtures():
+    fixtures = {}
+    for path, (filename, key_param) in ROUTES.items():
+        with open(os.path.join(FIXTURE_DIR, filename), 'rb') as f:
+            fixtures[path] = (json.load(f), key_param)
+    return fixtures
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'UpstreamStub/1.0'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = self.server.fixtures.get(url.path.rstrip('/'))
+        if route is None:
+            return self.send_json(404, {'cod': '404', 'message': 'Not found'})
+        body, key_param = route
+        query = parse_qs(url.query)
+        if not query.get(key_param):
+            return self.send_json(401, {'cod': 401, 'message': 'Invalid API key'})
+
+        delay, outcome = self.server.behaviour.draw()
+        time.sleep(delay)
+        if outcome == 'timeout':
+            # The client gave up long ago; just drop the connection
+            self.close_connection = True
+            return
+        if outcome == 'error':
+            return self.send_json(self.server.behaviour.error_status, {'message': 'Injected upstream error'})
+
+        if 'coord' in body and 'lat' in query and 'lon' in query:
+            # Echo the requested location like the real API does
+            body = {**body, 'coord': {'lon': float(query['lon'][0]), 'lat': float(query['lat'][0])}}
+        return self.send_json(200, body)
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=0, behaviour=None, verbose=False):
+    """
+    A ``ThreadingHTTPServer`` replaying the OpenWeather and data.gov.in
+    fixtures in farmers/fixtures/upstream. Port 0 picks a free port; read
+    it back from ``server.server_address``.
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.fixtures = _load_fixtures()
+    server.behaviour = behaviour or StubBehaviour()
+    server.verbose = verbose
+    return server
@@ -0,0 +1,76 @@
+from .upstream import get_client
+from .weather_cache import grid_cell, weather_cache
+
+# kind -> (OpenWeather endpoint, fallback error message)
+WEATHER_ENDPOINTS = {
+    'current': ('weather', 'Failed to fetch weather'),
+    'forecast': ('forecast', 'Failed to fetch weather forecast'),
+}
+
+
+class OpenWeatherError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _params(lat, lon):
+    return {'lat': lat, 'lon': lon, 'units': 'metric'}
+
+
+def _payload(resp):
+    if resp.status_code != 200:
+        raise OpenWeatherError(resp.data.get('message'), resp.status_code)
+    return resp.data
+
+
+def fetch_openweather(endpoint, lat, lon):
+    resp = get_client('openweather').get_json(f"data/2.5/{endpoint}", params=_params(lat, lon))
+    return _payload(resp)
+
+
+async def afetch_openweather(endpoint, lat, lon):
+    resp = await get_client('openweather').aget_json(f"data/2.5/{endpoint}", params=_params(lat, lon))
+    return _payload(resp)
+
+
+def _grid_cell(query_params):
+    lat = query_params.get('lat')
+    lon = query_params.get('lon')
+    if not lat or not lon:
+        raise OpenWeatherError('lat and lon are required', 400)
+    try:
+        return grid_cell(lat, lon)
+    except ValueError:
+        raise OpenWeatherError('lat and lon must be numbers', 400)
+
+
+def weather_payload(kind, query_params):
+    """Return ``(payload, status)`` for the weather views."""
+    endpoint, error_message = WEATHER_ENDPOINTS[kind]
+    try:
+        lat, lon = _grid_cell(query_params)
+        data = weather_cache.get_or_fetch(
+            kind, lat, lon, lambda: fetch_openweather(endpoint, lat, lon)
+        )
+        return data, 200
+    except OpenWeatherError as e:
+        return {'error': e.message or error_message}, e.status_code
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+
+async def aweather_payload(kind, query_params):
+    """Coroutine version of ``weather_payload``."""
+    endpoint, error_message = WEATHER_ENDPOINTS[kind]
+    try:
+        lat, lon = _grid_cell(query_params)
+        data = await weather_cache.aget_or_fetch(
+            kind, lat, lon, lambda: afetch_openweather(endpoint, lat, lon)
+        )
+        return data, 200
+    except OpenWeatherError as e:
+        return {'error': e.message or error_message}, e.status_code
+    except Exception as e:
+        return {'error': str(e)}, 500
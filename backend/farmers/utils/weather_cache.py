@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+
+
+def grid_cell(lat, lon, precision=None):
+    """
+    Snap a coordinate pair to the centre of its grid cell.
+
+    With the default precision of 2 decimal places a cell is roughly
+    1.1 km x 1.1 km, so farmers in the same village share one entry.
+    """
+    if precision is None:
+        precision = getattr(settings, 'WEATHER_CACHE_PRECISION', 2)
+    return round(float(lat), precision), round(float(lon), precision)
+
+
+class WeatherCache:
+    """
+    TTL cache for OpenWeather payloads with stale-while-revalidate.
+
+    Entries are keyed on ``(kind, lat, lon)`` where the coordinates are
+    already snapped to a grid cell. A fresh entry is returned as-is. An
+    expired entry that is still inside the stale window is returned
+    immediately and refreshed on a background thread. Anything older is
+    fetched synchronously.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._refreshing = set()
+        # Strong references so background refresh tasks are not garbage collected
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def ttl(self, kind):
+        ttls = getattr(settings, 'WEATHER_CACHE_TTLS', {})
+        return ttls.get(kind, {'current': 10 * 60, 'forecast': 60 * 60}.get(kind, 10 * 60))
+
+    @property
+    def stale_window(self):
+        return getattr(settings, 'WEATHER_CACHE_STALE_SECONDS', 30 * 60)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'WEATHER_CACHE_MAX_ENTRIES', 10000)
+
+    def _store(self, key, value):
+        with self._lock:
+            # Re-insert so dict order tracks recency of writes
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.monotonic())
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def _refresh(self, key, fetch):
+        try:
+            self._store(key, fetch())
+        except Exception:
+            # Keep the stale entry; a later request will try again.
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _arefresh(self, key, afetch):
+        try:
+            self._store(key, await afetch())
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _lookup(self, key):
+        """
+        Classify ``key`` as ``'hit'``, ``'stale'`` or ``'miss'``.
+
+        Returns ``(state, value, start_refresh)``; ``start_refresh`` is true
+        for exactly one caller per stale entry.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = now - stored_at
+                ttl = self.ttl(key[0])
+                if age < ttl:
+                    self.hits += 1
+                    return 'hit', value, False
+                if age < ttl + self.stale_window:
+                    self.stale += 1
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                    return 'stale', value, start
+            self.misses += 1
+            return 'miss', None, False
+
+    def get_or_fetch(self, kind, lat, lon, fetch):
+        """
+        Return the cached payload for the cell, calling ``fetch()`` when needed.
+
+        ``fetch`` must return the payload to cache or raise; errors are not
+        cached.
+        """
+        key = (kind, lat, lon)
+        state, value, start = self._lookup(key)
+        if state == 'stale' and start:
+            threading.Thread(target=self._refresh, args=(key, fetch), daemon=True).start()
+        if state != 'miss':
+            return value
+
+        value = fetch()
+        self._store(key, value)
+        return value
+
+    async def aget_or_fetch(self, kind, lat, lon, afetch):
+        """Coroutine version of ``get_or_fetch``; stale entries are refreshed in a task on the running loop."""
+        key = (kind, lat, lon)
+        state, value, start = self._lookup(key)
+        if state == 'stale' and start:
+            task = asyncio.create_task(self._arefresh(key, afetch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if state != 'miss':
+            return value
+
+        value = await afetch()
+        self._store(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'hit_ratio': round((self.hits + self.stale) / lookups, 4) if lookups else None,
+                'entries': len(self._entries),
+                'precision': getattr(settings, 'WEATHER_CACHE_PRECISION', 2),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+            self.hits = self.misses = self.stale = 0
+
+
+weather_cache = WeatherCache()
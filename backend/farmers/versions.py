@@ -0,0 +1,19 @@
+from .models import StatCounter
+from .stats import bump
+
+# Per-table version counters, stored as StatCounter rows named "version:<table>".
+# Writers bump them from signal handlers; in-process caches compare them to
+# notice writes made by other worker processes.
+VERSION_PREFIX = 'version:'
+
+
+def bump_version(table):
+    bump(f'{VERSION_PREFIX}{table}')
+
+
+def get_version(table):
+    return (
+        StatCounter.objects.filter(name=f'{VERSION_PREFIX}{table}', day__isnull=True)
+        .values_list('value', flat=True).first()
+        or 0
+    )
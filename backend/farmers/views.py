@@ -1,3 +1,5 @@
+import logging
+
 import requests
 from django.shortcuts import render
 from rest_framework import status, generics
@@ -9,18 +11,38 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.decorators import api_view
 from rest_framework import generics, permissions
-from .models import Blog, Comment, Poll, Vote
+from .models import Blog, Choice, Comment, Poll, Tag, Vote
 from .serializers import BlogSerializer, CommentSerializer, PollSerializer, VoteSerializer
 from rest_framework.decorators import api_view, permission_classes
-from .utils.pdf_generator import generate_blog_pdf
-from django.db.models import Count
+from .pagination import CreatedAtCursorPagination, DateJoinedCursorPagination
+from .search import search_blog_ids
+from .stats import dashboard_stats, growth_series, recompute_stats
+from .eligibility import scheme_index
+from . import metrics
+from .authentication import CachedTokenAuthentication
+from .etags import blog_etag, profile_etag, scheme_etag, scheme_list_etag
+from .utils.conditional import not_modified, set_validators
+from .utils.pdf_cache import PdfRenderError, blog_pdf_cache, iter_blog_pdf_zip
+from .utils.market_prices import market_price_payload
+from .utils.weather import weather_payload
+from .utils.weather_cache import weather_cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime
 from django.contrib.auth.decorators import user_passes_test
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.conf import settings
 from django.utils import timezone
-from rest_framework import parsers
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, parsers
+from rest_framework.utils.urls import replace_query_param
 
 
 from .serializers import (
+    AdminUserListSerializer,
     UserRegistrationSerializer,
     UserProfileSerializer,
     GovernmentSchemeSerializer
@@ -28,14 +50,14 @@ from .serializers import (
 from .models import User, GovernmentScheme
 from django.contrib.auth import get_user_model
 
-#Weather API Key
-OPENWEATHER_API_KEY = "2a496ed70c4234605ff47cea15a3bd6a"
+logger = logging.getLogger(__name__)
 
 # Admin permission check
 def is_admin(user):
-    print(f"DEBUG: Checking admin access for user {user.name} with role {user.role}")
-    print(f"DEBUG: User is_authenticated: {user.is_authenticated}")
-    print(f"DEBUG: User is_staff: {user.is_staff}")
+    logger.debug(
+        "Checking admin access for user %s (role=%s, is_authenticated=%s, is_staff=%s)",
+        user.pk, getattr(user, 'role', None), user.is_authenticated, user.is_staff,
+    )
     return user.is_authenticated and user.role == 'administrator'
 
 #User Registration
@@ -60,6 +82,15 @@ class UserLoginView(APIView):
             return Response({'token': token.key}, status=status.HTTP_200_OK)
         return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
+# 🚪 User Logout
+class UserLogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        # Deleting the token also evicts it from the authentication cache
+        Token.objects.filter(key=request.auth.key).delete()
+        return Response({'message': 'Logged out'}, status=status.HTTP_200_OK)
+
 # 👤 User Profile View/Update
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
@@ -67,9 +98,20 @@ class UserProfileView(APIView):
 
     def get(self, request):
         try:
-            serializer = UserProfileSerializer(request.user)
+            # Farmers get farmer fields only; ?fields= / ?omit= narrow it further
+            fields = UserProfileSerializer.projection_from_request(request, role=request.user.role)
+            # Read the row rather than serve request.user: the token cache is
+            # only invalidated in the process that saved the user, so another
+            # worker's edit could otherwise show up here only after the TTL.
+            # Only the projected columns are loaded.
+            user = User.objects.only('id', 'updated_at', *fields).get(pk=request.user.pk)
+            etag = profile_etag(user, fields)
+            cached = not_modified(request, etag, vary=['Authorization'])
+            if cached is not None:
+                return cached
+            serializer = UserProfileSerializer(user, fields=fields)
             data = serializer.data
-            return Response(data)
+            return set_validators(Response(data), etag, vary=['Authorization'])
         except Exception as e:
             return Response({'error': f'Failed to serialize user profile: {str(e)}'}, status=500)
 
@@ -96,38 +138,16 @@ class WeatherAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        lat = request.query_params.get('lat')
-        lon = request.query_params.get('lon')
-        if not lat or not lon:
-            return Response({'error': 'lat and lon are required'}, status=400)
-        url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
-        try:
-            resp = requests.get(url, timeout=5)
-            data = resp.json()
-            if resp.status_code != 200:
-                return Response({'error': data.get('message', 'Failed to fetch weather')}, status=resp.status_code)
-            return Response(data)
-        except Exception as e:
-            return Response({'error': str(e)}, status=500)
+        data, status_code = weather_payload('current', request.query_params)
+        return Response(data, status=status_code)
 
 # 📅 5-day Weather Forecast
 class WeatherForecastAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        lat = request.query_params.get('lat')
-        lon = request.query_params.get('lon')
-        if not lat or not lon:
-            return Response({'error': 'lat and lon are required'}, status=400)
-        url = f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
-        try:
-            resp = requests.get(url, timeout=5)
-            data = resp.json()
-            if resp.status_code != 200:
-                return Response({'error': data.get('message', 'Failed to fetch weather forecast')}, status=resp.status_code)
-            return Response(data)
-        except Exception as e:
-            return Response({'error': str(e)}, status=500)
+        data, status_code = weather_payload('forecast', request.query_params)
+        return Response(data, status=status_code)
 
 # 🏪 Market Price API
 import requests
@@ -139,60 +159,8 @@ class MarketPriceAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # 1. Get filter parameters from the frontend's request
-        commodity_filter = request.query_params.get('commodity', '').lower()
-        state_filter = request.query_params.get('state', '').lower()
-        district_filter = request.query_params.get('district', '').lower()
-
-        try:
-            # 2. Fetch the full dataset from the external API
-            api_url = "https://api.data.gov.in/resource/35985678-0d79-46b4-9ed6-6f13308a1d24"
-            params = {
-                "api-key": "579b464db66ec23bdd000001cdd3946e44ce4aad7209ff7b23ac571b",
-                "format": "json",
-                "limit": 1000 
-            }
-            response = requests.get(api_url, params=params, timeout=15)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            data = response.json()
-            
-            all_records = data.get("records", [])
-
-            # 3. Filter the records on the backend
-            filtered_records = all_records
-
-            if state_filter:
-                filtered_records = [
-                    rec for rec in filtered_records 
-                    if rec.get('State', '').lower() == state_filter
-                ]
-
-            if district_filter:
-                filtered_records = [
-                    rec for rec in filtered_records 
-                    if rec.get('District', '').lower() == district_filter
-                ]
-
-            if commodity_filter:
-                filtered_records = [
-                    rec for rec in filtered_records 
-                    if commodity_filter in rec.get('Commodity', '').lower()
-                ]
-
-
-            # 4. Return the *filtered* data to the frontend
-            return Response({"records": filtered_records})
-
-        except requests.RequestException as e:
-            return Response(
-                {"error": "Failed to fetch data from external API.", "details": str(e)},
-                status=502  # Bad Gateway
-            )
-        except Exception as e:
-            return Response(
-                {"error": "An unexpected error occurred.", "details": str(e)},
-                status=500 # Internal Server Error
-            )
+        data, status_code = market_price_payload(request.query_params)
+        return Response(data, status=status_code)
 
 
 # 🏛️ Government Schemes
@@ -200,9 +168,30 @@ class GovernmentSchemeListAPIView(generics.ListAPIView):
     queryset = GovernmentScheme.objects.all()
     serializer_class = GovernmentSchemeSerializer
 
+    def list(self, request, *args, **kwargs):
+        etag = scheme_list_etag()
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        return set_validators(super().list(request, *args, **kwargs), etag)
+
+# 🏛️ Government Schemes matching the requesting user
+class EligibleSchemeListAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        index = scheme_index.get()
+        return Response([index.payloads[scheme_id] for scheme_id in index.match_user(request.user)])
+
 # 🏛️ Government Scheme Detail
 @api_view(['GET', 'PUT', 'PATCH'])
 def scheme_detail(request, pk):
+    if request.method == 'GET':
+        etag = scheme_etag(pk)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
     try:
         scheme = GovernmentScheme.objects.get(pk=pk)
     except GovernmentScheme.DoesNotExist:
@@ -210,7 +199,7 @@ def scheme_detail(request, pk):
 
     if request.method == 'GET':
         serializer = GovernmentSchemeSerializer(scheme)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag)
     elif request.method in ['PUT', 'PATCH']:
         serializer = GovernmentSchemeSerializer(scheme, data=request.data, partial=True)
         if serializer.is_valid():
@@ -230,59 +219,161 @@ class BlogCreateView(generics.CreateAPIView):
 
 # 📝 Blog List/Create
 class BlogListCreateView(generics.ListCreateAPIView):
-    queryset = Blog.objects.all().order_by('-created_at')
+    queryset = Blog.objects.for_feed()
     serializer_class = BlogSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CreatedAtCursorPagination
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
 # 📝 Blog Detail
 class BlogDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Blog.objects.all()
+    queryset = Blog.objects.for_feed()
     serializer_class = BlogSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def retrieve(self, request, *args, **kwargs):
+        etag = blog_etag(kwargs['pk'], request.user)
+        if etag is None:
+            return super().retrieve(request, *args, **kwargs)
+        cached = not_modified(request, etag, vary=['Authorization'])
+        if cached is not None:
+            return cached
+        response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, etag, vary=['Authorization'])
+
+# 🔎 Blog Search
+class BlogSearchView(APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    max_page_size = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        tag = request.query_params.get('tag', '').strip().lstrip('#').lower()
+        if not query and not tag:
+            return Response({'error': 'q or tag is required'}, status=400)
+
+        if not query:
+            # Tag only: newest first through the tag index
+            paginator = CreatedAtCursorPagination()
+            blogs = paginator.paginate_queryset(
+                Blog.objects.for_feed().filter(normalized_tags__name=tag), request
+            )
+            serializer = BlogSerializer(blogs, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data)
+
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), self.max_page_size)
+        except ValueError:
+            return Response({'error': 'page and page_size must be integers'}, status=400)
+
+        # Ranked ids first, then one feed query for just this page
+        ids = search_blog_ids(query, tag=tag or None, limit=page_size + 1, offset=(page - 1) * page_size)
+        has_next = len(ids) > page_size
+        ids = ids[:page_size]
+        blogs = Blog.objects.for_feed().in_bulk(ids)
+        ranked = [blogs[blog_id] for blog_id in ids if blog_id in blogs]
+        serializer = BlogSerializer(ranked, many=True, context={'request': request})
+
+        next_url = None
+        if has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), 'page', page + 1)
+        return Response({'next': next_url, 'results': serializer.data})
+
+# 🏷️ Tag counts
+class TagListView(APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        tags = (
+            Tag.objects.annotate(blog_count=Count('blogs'))
+            .filter(blog_count__gt=0)
+            .order_by('-blog_count', 'name')
+        )
+        prefix = request.query_params.get('prefix', '').strip().lower()
+        if prefix:
+            tags = tags.filter(name__startswith=prefix)
+        return Response([{'name': tag.name, 'count': tag.blog_count} for tag in tags[:50]])
+
 # 💬 Comment List/Create
 class CommentListCreateView(generics.ListCreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         blog_id = self.kwargs.get('blog_id')
-        return Comment.objects.filter(blog_id=blog_id).order_by('-created_at')
+        return Comment.objects.filter(blog_id=blog_id).select_related('author')
 
     def perform_create(self, serializer):
         blog_id = self.kwargs.get('blog_id')
-        serializer.save(author=self.request.user, blog_id=blog_id)
+        with transaction.atomic():
+            serializer.save(author=self.request.user, blog_id=blog_id)
+            Blog.objects.filter(id=blog_id).update(comment_count=F('comment_count') + 1)
 
 # 🗳️ Vote Create
 class VoteCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        serializer = VoteSerializer(data=request.data)
+        serializer = VoteSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(voted_by=request.user)
+            try:
+                with transaction.atomic():
+                    vote = serializer.save()
+                    Choice.objects.filter(id=vote.choice_id).update(vote_count=F('vote_count') + 1)
+            except IntegrityError:
+                # Lost a race with another vote by the same user
+                return Response({'non_field_errors': ['You have already voted in this poll.']}, status=400)
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
+# 📊 Poll Results
+class PollResultsView(APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request, poll_id):
+        try:
+            poll = Poll.objects.prefetch_related('choices').get(id=poll_id)
+        except Poll.DoesNotExist:
+            return Response({'error': 'Poll not found'}, status=404)
+        data = PollSerializer(poll, context={'request': request}).data
+        total = data['total_votes']
+        for choice in data['choices']:
+            choice['percentage'] = round(100 * choice['vote_count'] / total, 1) if total else 0.0
+        return Response(data)
+
 # 👍 Like Blog
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def like_blog(request, blog_id):
-    try:
-        blog = Blog.objects.get(id=blog_id)
-        user = request.user
-        if user in blog.likes.all():
-            blog.likes.remove(user)
-            return Response({'message': 'Blog unliked'}, status=200)
-        else:
-            blog.likes.add(user)
-            return Response({'message': 'Blog liked'}, status=200)
-    except Blog.DoesNotExist:
+    if not Blog.objects.filter(id=blog_id).exists():
         return Response({'error': 'Blog not found'}, status=404)
 
+    Like = Blog.likes.through
+    user = request.user
+    with transaction.atomic():
+        # Only the request that actually removed or added the row moves the
+        # counter, so concurrent toggles from the same user cannot drift it
+        deleted, _ = Like.objects.filter(blog_id=blog_id, user_id=user.id).delete()
+        if deleted:
+            Blog.objects.filter(id=blog_id).update(like_count=F('like_count') - 1)
+            is_liked = False
+        else:
+            _, created = Like.objects.get_or_create(blog_id=blog_id, user_id=user.id)
+            if created:
+                Blog.objects.filter(id=blog_id).update(like_count=F('like_count') + 1)
+            is_liked = True
+        likes_count = Blog.objects.values_list('like_count', flat=True).get(id=blog_id)
+
+    return Response({
+        'message': 'Blog liked' if is_liked else 'Blog unliked',
+        'likes_count': likes_count,
+        'is_liked': is_liked,
+    }, status=200)
+
 # 💾 Toggle Save Post
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -304,22 +395,44 @@ def toggle_save_post(request, blog_id):
 @permission_classes([IsAuthenticated])
 def get_saved_posts(request):
     user = request.user
-    saved_posts = user.saved_posts.all().order_by('-created_at')
+    paginator = CreatedAtCursorPagination()
+    saved_posts = paginator.paginate_queryset(
+        Blog.objects.for_feed().filter(saved_by_users=user), request
+    )
     serializer = BlogSerializer(saved_posts, many=True, context={'request': request})
-    return Response(serializer.data)
+    return paginator.get_paginated_response(serializer.data)
 
 # 📄 Download Blog PDF
+BLOG_PDF_FIELDS = ('id', 'content', 'tags', 'image', 'updated_at')
+
 @api_view(['GET'])
 def download_blog_pdf(request, blog_id):
     try:
-        blog = Blog.objects.get(id=blog_id)
-        pdf_content = generate_blog_pdf(blog)
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="blog_{blog_id}.pdf"'
-        return response
+        blog = Blog.objects.only(*BLOG_PDF_FIELDS).get(id=blog_id)
     except Blog.DoesNotExist:
         return Response({'error': 'Blog not found'}, status=404)
 
+    etag = blog_pdf_cache.etag(blog)
+    cached = not_modified(request, etag, blog.updated_at)
+    if cached is not None:
+        return cached
+
+    try:
+        path = blog_pdf_cache.get_or_schedule(blog)
+    except PdfRenderError:
+        return Response({'error': 'Failed to generate the PDF of this blog'}, status=500)
+    if path is None:
+        # Rendering on the worker pool; the client retries shortly
+        response = Response({'status': 'rendering'}, status=202)
+        response['Retry-After'] = '2'
+        return response
+
+    response = FileResponse(
+        open(path, 'rb'), as_attachment=True,
+        filename=f"blog_{blog.id}.pdf", content_type='application/pdf',
+    )
+    return set_validators(response, etag, blog.updated_at)
+
 # ===== ADMIN API ENDPOINTS =====
 
 # 🧪 Test endpoint
@@ -336,6 +449,26 @@ def health_check(request):
         'timestamp': timezone.now().isoformat()
     })
 
+# 📈 Prometheus metrics
+def can_read_metrics(request):
+    """The METRICS_AUTH_TOKEN bearer token or an administrator's token, unless METRICS_PUBLIC is set."""
+    if getattr(settings, 'METRICS_PUBLIC', False):
+        return True
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    try:
+        result = CachedTokenAuthentication().authenticate(request)
+    except exceptions.AuthenticationFailed:
+        return False
+    return result is not None and is_admin(result[0])
+
+@require_GET
+def metrics_view(request):
+    if not can_read_metrics(request):
+        return JsonResponse({'error': 'Metrics require the scrape token or an administrator'}, status=401)
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # 🧪 Test User model endpoint
 @api_view(['GET'])
 def test_user_model(request):
@@ -369,52 +502,99 @@ def debug_user_status(request):
 # 📊 Admin Statistics
 class AdminStatsView(APIView):
     permission_classes = [IsAuthenticated]
-    
+
     def get(self, request):
-        print(f"DEBUG: AdminStatsView called by user {request.user.name}")
-        print(f"DEBUG: Request headers: {request.headers}")
-        print(f"DEBUG: User authenticated: {request.user.is_authenticated}")
-        
         if not is_admin(request.user):
-            print(f"DEBUG: User {request.user.name} is not admin")
             return Response({'error': 'Admin access required'}, status=403)
-        
-        print(f"DEBUG: User {request.user.name} is admin, getting stats")
+
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 366)
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=400)
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in ('day', 'week', 'month'):
+            return Response({'error': 'bucket must be day, week or month'}, status=400)
+
         try:
-            # Get statistics
-            total_users = User.objects.count()
-            total_blogs = Blog.objects.count()
-            total_schemes = GovernmentScheme.objects.count()
-            
-            # Users by role
-            users_by_role = User.objects.values('role').annotate(count=Count('id'))
-            role_stats = {item['role']: item['count'] for item in users_by_role}
-            
-            print(f"DEBUG: Stats - Users: {total_users}, Blogs: {total_blogs}, Schemes: {total_schemes}")
-            return Response({
-                'totalUsers': total_users,
-                'totalBlogs': total_blogs,
-                'totalSchemes': total_schemes,
-                'usersByRole': role_stats
-            })
+            # Served from the signal-maintained counters; no table scans
+            data = dashboard_stats()
+            data['growth'] = growth_series(days=days, bucket=bucket)
+            return Response(data)
         except Exception as e:
-            print(f"DEBUG: Error in AdminStatsView: {str(e)}")
+            logger.exception("Failed to build admin statistics")
             return Response({'error': f'Failed to get statistics: {str(e)}'}, status=500)
 
+    def post(self, request):
+        """Rebuild the counters from the source tables."""
+        if not is_admin(request.user):
+            return Response({'error': 'Admin access required'}, status=403)
+        recompute_stats()
+        return Response(dashboard_stats())
+
+# 🌦️ Weather cache counters
+class AdminWeatherCacheStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not is_admin(request.user):
+            return Response({'error': 'Admin access required'}, status=403)
+        return Response(weather_cache.stats())
+
 # 👥 Admin User Management
+def prefix_range(prefix):
+    """(low, high) bounds matching every string starting with ``prefix``, usable by a B-tree index."""
+    return prefix, prefix + '\U0010ffff'
+
+
+def parse_query_datetime(value):
+    """Parse an ISO date or datetime query parameter into an aware datetime, or None."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        parsed = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 class AdminUserListView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
         if not is_admin(request.user):
             return Response({'error': 'Admin access required'}, status=403)
-        
-        users = User.objects.all().order_by('-date_joined')
-        try:
-            serializer = UserProfileSerializer(request.user)
-            return Response(serializer.data)
-        except Exception as e:
-            return Response({"error": "Something went wrong"}, status=500)
+
+        params = request.query_params
+        users = User.objects.only(*AdminUserListSerializer.Meta.fields)
+
+        for field in ('role', 'state', 'district'):
+            if params.get(field):
+                users = users.filter(**{field: params[field]})
+        if params.get('is_active') in ('true', 'false'):
+            users = users.filter(is_active=params['is_active'] == 'true')
+
+        for param, lookup in (('joined_after', 'date_joined__gte'), ('joined_before', 'date_joined__lt')):
+            if params.get(param):
+                value = parse_query_datetime(params[param])
+                if value is None:
+                    return Response({'error': f'{param} must be an ISO date or datetime'}, status=400)
+                users = users.filter(**{lookup: value})
+
+        search = params.get('q', '').strip()
+        if search:
+            low, high = prefix_range(search.lower())
+            phone_low, phone_high = prefix_range(search)
+            users = users.annotate(name_lower=Lower('name')).filter(
+                Q(phone__gte=phone_low, phone__lt=phone_high)
+                | Q(name_lower__gte=low, name_lower__lt=high)
+            )
+
+        paginator = DateJoinedCursorPagination()
+        page = paginator.paginate_queryset(users, request)
+        serializer = AdminUserListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class AdminUserDetailView(APIView):
@@ -425,8 +605,9 @@ class AdminUserDetailView(APIView):
             return Response({'error': 'Admin access required'}, status=403)
         
         try:
-            user = User.objects.get(id=user_id)
-            serializer = UserProfileSerializer(user)
+            fields = UserProfileSerializer.projection_from_request(request)
+            user = User.objects.only('id', *fields).get(id=user_id)
+            serializer = UserProfileSerializer(user, fields=fields)
             return Response(serializer.data)
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=404)
@@ -464,9 +645,31 @@ class AdminBlogListView(APIView):
         if not is_admin(request.user):
             return Response({'error': 'Admin access required'}, status=403)
         
-        blogs = Blog.objects.all().order_by('-created_at')
+        paginator = CreatedAtCursorPagination()
+        blogs = paginator.paginate_queryset(Blog.objects.for_feed(), request)
         serializer = BlogSerializer(blogs, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
+
+class AdminBlogPdfExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not is_admin(request.user):
+            return Response({'error': 'Admin access required'}, status=403)
+
+        blogs = Blog.objects.only(*BLOG_PDF_FIELDS).order_by('id')
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                blogs = blogs.filter(id__in=[int(i) for i in ids.split(',') if i.strip()])
+            except ValueError:
+                return Response({'error': 'ids must be a comma-separated list of blog ids'}, status=400)
+
+        response = StreamingHttpResponse(
+            iter_blog_pdf_zip(blogs.iterator(chunk_size=200)), content_type='application/zip'
+        )
+        response['Content-Disposition'] = 'attachment; filename="blogs.zip"'
+        return response
 
 class AdminBlogDetailView(APIView):
     permission_classes = [IsAuthenticated]
@@ -476,7 +679,7 @@ class AdminBlogDetailView(APIView):
             return Response({'error': 'Admin access required'}, status=403)
         
         try:
-            blog = Blog.objects.get(id=blog_id)
+            blog = Blog.objects.for_feed().get(id=blog_id)
             serializer = BlogSerializer(blog, context={'request': request})
             return Response(serializer.data)
         except Blog.DoesNotExist:
@@ -16,7 +16,7 @@ function BlogFeed() {
         const response = await fetch("http://localhost:8000/api/farmers/blogs/");
         if (!response.ok) throw new Error("Failed to fetch blogs");
         const data = await response.json();
-        setBlogs(data);
+        setBlogs(data.results || data);
       } catch (error) {
         console.error("Error fetching blogs:", error);
       } finally {
@@ -149,13 +149,20 @@ function BlogFeed() {
   
   const handleDownloadPdf = async (blogId) => {
     try {
-      const response = await fetch(`http://localhost:8000/api/farmers/blogs/${blogId}/download-pdf/`, {
-        headers: {
-          'Authorization': `Token ${localStorage.getItem('token')}`,
-        }
-      });
+      let response;
+      // 202 means the PDF is still being rendered; retry as the server asks
+      for (let attempt = 0; attempt < 10; attempt++) {
+        response = await fetch(`http://localhost:8000/api/farmers/blogs/${blogId}/download-pdf/`, {
+          headers: {
+            'Authorization': `Token ${localStorage.getItem('token')}`,
+          }
+        });
+        if (response.status !== 202) break;
+        const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 2;
+        await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+      }
   
-      if (!response.ok) throw new Error('Failed to download PDF');
+      if (!response.ok || response.status === 202) throw new Error('Failed to download PDF');
   
       const blob = await response.blob();
       const url = window.URL.createObjectURL(blob);
@@ -187,7 +194,7 @@ function BlogFeed() {
   
         if (response.ok) {
           const data = await response.json();
-          setCommentsMap(prev => ({ ...prev, [blogId]: data }));
+          setCommentsMap(prev => ({ ...prev, [blogId]: data.results || data }));
         } else {
           console.error('Failed to fetch comments');
         }
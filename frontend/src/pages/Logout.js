@@ -5,7 +5,14 @@ export default function Logout() {
   const navigate = useNavigate();
 
   useEffect(() => {
-    // Remove token and any other user data
+    // Revoke the token on the server, then remove it and any other user data
+    const token = localStorage.getItem("token");
+    if (token) {
+      fetch("http://localhost:8000/api/logout/", {
+        method: "POST",
+        headers: { Authorization: `Token ${token}` },
+      }).catch(() => {});
+    }
     localStorage.removeItem("token");
     // Optionally clear more user data here
     // Redirect after 1.5 seconds
@@ -37,7 +37,7 @@ export default function Profile() {
         const res = await axios.get("http://localhost:8000/api/farmers/blogs/saved/", {
           headers: { Authorization: `Token ${token}` },
         });
-        setSavedPosts(res.data);
+        setSavedPosts(res.data.results || res.data);
       } catch (err) {
         console.error("Failed to fetch saved posts", err);
       } finally {